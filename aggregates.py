@@ -0,0 +1,164 @@
+# aggregates.py
+"""
+Daily aggregate store: each module is rolled up into per-day, per-dimension
+counts and amount sums (keyed by the UTC day of Created_Time), so metrics for any
+date range are answered by summing day buckets instead of rescanning records.
+
+Dimensions (columns are picked the same way MetricsCalculator picks them):
+
+    every module  _all           records created that day (+ Amount sum for Pipelines)
+    Contacts      lead_source    Lead_Source values
+                  status         lead status/stage/rating values
+    Accounts      industry       Industry values
+    Pipelines     stage          stage values, with the Amount sum per stage
+    Tasks         email_tasks    tasks whose subject/type mentions email/mail
+
+Records without a parseable Created_Time go to the UNDATED bucket: they count
+towards all-time totals but never towards a date range.
+"""
+from datetime import date
+from typing import Dict, Optional
+import pandas as pd
+from sqlalchemy import inspect, text
+from data_processor import DataProcessor
+
+TABLE = "zoho_daily_aggregates"
+UNDATED = date(1900, 1, 1)
+FIRST_DAY = date(1900, 1, 2)
+KEY = ["day", "dimension", "value"]
+COLUMNS = KEY + ["record_count", "amount"]
+# Keeps the clustered primary key within SQL Server's 900-byte limit.
+VALUE_CHARS = 200
+
+
+def _find(df: pd.DataFrame, predicate) -> Optional[str]:
+    return next((c for c in df.columns if predicate(c.lower())), None)
+
+
+def _amount(df: pd.DataFrame, col: Optional[str]) -> pd.Series:
+    if not col:
+        return pd.Series(0.0, index=df.index)
+    return pd.to_numeric(df[col], errors="coerce").fillna(0).astype(float)
+
+
+def _dimensions(module: str, df: pd.DataFrame) -> Dict[str, tuple]:
+    """dimension name -> (value column or None, amount column or None)."""
+    dims = {}
+    amount_col = None
+    if module == "Pipelines":
+        amount_col = _find(df, lambda c: "amount" in c or "value" in c)
+    dims["_all"] = (None, amount_col)
+    if module == "Contacts":
+        dims["lead_source"] = (_find(df, lambda c: "lead" in c and "source" in c), None)
+        dims["status"] = (_find(df, lambda c: any(k in c for k in ["status", "stage", "rating"])), None)
+    elif module == "Accounts":
+        dims["industry"] = (_find(df, lambda c: "industry" in c), None)
+    elif module == "Pipelines":
+        dims["stage"] = (_find(df, lambda c: "stage" in c or "status" in c), amount_col)
+    elif module == "Tasks":
+        dims["email_tasks"] = (_find(df, lambda c: "subject" in c or "type" in c), None)
+    return {name: spec for name, spec in dims.items() if name == "_all" or spec[0]}
+
+
+def compute_daily(module: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Per-day, per-dimension rollup of one module frame (columns: COLUMNS)."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    df = DataProcessor.normalize_datetimes(df)
+    created = pd.to_datetime(df["Created_Time"], errors="coerce") if "Created_Time" in df.columns \
+        else pd.Series(pd.NaT, index=df.index)
+    day = created.dt.date.astype(object).where(created.notna(), UNDATED)
+
+    parts = []
+    for name, (col, amount_col) in _dimensions(module, df).items():
+        amount = _amount(df, amount_col)
+        if col is None:
+            value = pd.Series("", index=df.index)
+        elif name == "email_tasks":
+            hits = df[col].astype(str).str.lower().str.contains("email|mail", na=False, regex=True)
+            value = pd.Series("", index=df.index)[hits]
+        else:
+            value = df[col].astype(object).where(df[col].notna())
+            value = value.dropna().astype(str).str.slice(0, VALUE_CHARS)
+        frame = pd.DataFrame({"day": day.loc[value.index], "value": value, "amount": amount.loc[value.index]})
+        grouped = frame.groupby(["day", "value"], sort=False).agg(record_count=("amount", "size"),
+                                                                   amount=("amount", "sum")).reset_index()
+        grouped.insert(1, "dimension", name)
+        parts.append(grouped)
+    out = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=COLUMNS)
+    out["record_count"] = out["record_count"].astype(int)
+    return out[COLUMNS]
+
+
+class DailyAggregateStore:
+    """
+    zoho_daily_aggregates in SQL Server (or SQLite locally). update() diffs the new
+    rollup against what is stored and only writes the day buckets that changed.
+    """
+    def __init__(self, db, service: str):
+        self.engine = db.engine
+        self.service = service
+        self._ensure_table()
+
+    def _ensure_table(self):
+        if inspect(self.engine).has_table(TABLE):
+            return
+        if self.engine.dialect.name == "mssql":
+            raise RuntimeError(f"{TABLE} is missing; create it with init_db_sql.sql")
+        with self.engine.begin() as conn:
+            conn.execute(text(f"""CREATE TABLE {TABLE} (
+                service VARCHAR(100) NOT NULL, module VARCHAR(50) NOT NULL, day DATE NOT NULL,
+                dimension VARCHAR(50) NOT NULL, value VARCHAR(200) NOT NULL,
+                record_count INTEGER NOT NULL, amount FLOAT NOT NULL DEFAULT 0,
+                PRIMARY KEY (service, module, day, dimension, value))"""))
+
+    def load(self, module: str) -> pd.DataFrame:
+        sql = text(f"SELECT day, dimension, value, record_count, amount FROM {TABLE} "
+                   "WHERE service = :svc AND module = :module")
+        with self.engine.connect() as conn:
+            rows = conn.execute(sql, {"svc": self.service, "module": module}).fetchall()
+        df = pd.DataFrame(rows, columns=COLUMNS)
+        df["day"] = pd.to_datetime(df["day"]).dt.date
+        return df
+
+    def update(self, module: str, df: pd.DataFrame) -> int:
+        """Writes the module's rollup; returns the number of day/dimension rows changed."""
+        new = compute_daily(module, df)
+        old = self.load(module)
+        merged = new.merge(old, on=KEY, how="outer", suffixes=("", "_old"), indicator=True)
+        changed = merged[(merged["_merge"] != "both")
+                         | (merged["record_count"] != merged["record_count_old"])
+                         | ((merged["amount"] - merged["amount_old"]).abs() > 1e-9)]
+        if changed.empty:
+            return 0
+        params = [{"svc": self.service, "module": module, "day": r.day, "dimension": r.dimension, "value": r.value}
+                  for r in changed.itertuples(index=False)]
+        inserts = changed[changed["_merge"] != "right_only"][COLUMNS].assign(service=self.service, module=module)
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {TABLE} WHERE service = :svc AND module = :module AND day = :day "
+                              "AND dimension = :dimension AND value = :value"), params)
+            if not inserts.empty:
+                inserts.to_sql(TABLE, conn, if_exists="append", index=False, chunksize=1000)
+        return len(changed)
+
+    def query(self, module: str, dimension: str, start: Optional[date] = None,
+              end: Optional[date] = None) -> pd.DataFrame:
+        """
+        Sums of (record_count, amount) per value over [start, end] (inclusive days).
+        With no range, every bucket including UNDATED is summed (all-time totals).
+        """
+        sql = (f"SELECT value, SUM(record_count) AS record_count, SUM(amount) AS amount FROM {TABLE} "
+               "WHERE service = :svc AND module = :module AND dimension = :dimension")
+        params = {"svc": self.service, "module": module, "dimension": dimension}
+        if start is not None or end is not None:
+            sql += " AND day >= :start AND day <= :end"
+            params.update(start=start or FIRST_DAY, end=end or date.max)
+        sql += " GROUP BY value ORDER BY SUM(record_count) DESC, value"
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(sql), params).fetchall()
+        return pd.DataFrame(rows, columns=["value", "record_count", "amount"])
+
+    def total(self, module: str, start: Optional[date] = None, end: Optional[date] = None) -> tuple:
+        """(record count, amount sum) for the module over the range (all-time when no range)."""
+        df = self.query(module, "_all", start, end)
+        return (int(df["record_count"].sum()), float(df["amount"].sum())) if not df.empty else (0, 0.0)
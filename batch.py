@@ -0,0 +1,71 @@
+# batch.py
+import re
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+from db import DB
+from transport import make_session
+
+
+def tenant_name(service: str) -> str:
+    """File- and table-safe form of a service name."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", service)
+
+
+def run_batch(cfg, args, run_service: Callable, services: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    Runs run_service for many service rows of zoho_tokens concurrently, at most
+    BATCH_WORKERS at a time. Each tenant gets its own TokenManager and RateLimiter
+    inside run_service. The SQLAlchemy engine and a pooled requests session are
+    created once and shared. A tenant that fails is reported and skipped; the
+    others carry on. Returns {service: status}.
+    """
+    if not cfg.SQL_ODBC:
+        print("ERROR: --batch needs SQL_SERVER_ODBC to read the service rows from zoho_tokens.")
+        return {}
+    workers = max(1, cfg.BATCH_WORKERS)
+    db = DB(cfg.SQL_ODBC, pool_size=workers + 2)
+
+    available = db.list_services()
+    if services:
+        for missing in [s for s in services if s not in available]:
+            print(f"    ⚠ {missing}: no token row in zoho_tokens, skipping")
+        services = [s for s in services if s in available]
+    else:
+        services = available
+    if not services:
+        print("No services to run.")
+        return {}
+
+    export_db = None
+    if "sql" in [f.strip() for f in args.formats.split(",")]:
+        export_db = DB.from_url(cfg.EXPORT_SQL_URL) if cfg.EXPORT_SQL_URL else db
+    # One pooled session for every tenant: connections (and TLS sessions) are reused across orgs.
+    session = make_session(workers * max(1, cfg.FETCH_CONCURRENCY))
+
+    def run_one(service: str):
+        start = time.perf_counter()
+        try:
+            ok = run_service(cfg, args, service, tenant=tenant_name(service), db=db, session=session,
+                             export_db=export_db)
+            status = "ok" if ok else "no report"
+        except Exception as e:
+            traceback.print_exc()
+            status = f"failed: {e}"
+        return service, status, time.perf_counter() - start
+
+    print(f"Batch: {len(services)} services (workers={workers})")
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tenant") as pool:
+            for future in as_completed([pool.submit(run_one, s) for s in services]):
+                service, status, seconds = future.result()
+                results[service] = status
+                print(f"  🏢 {service}: {status} ({seconds:.1f}s)")
+    finally:
+        session.close()
+
+    ok = sum(1 for s in results.values() if s == "ok")
+    print(f"Batch complete: {ok}/{len(services)} services reported")
+    return results
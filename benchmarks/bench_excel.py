@@ -0,0 +1,79 @@
+# benchmarks/bench_excel.py
+"""
+Time and peak RSS of the in-memory openpyxl writer vs the streaming write-only
+mode of MetricsExporter.create_excel. Each mode runs in its own subprocess.
+
+    python -m benchmarks.bench_excel --rows 100000 --cols 200
+"""
+import argparse
+import contextlib
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+
+def synthetic_module(rows: int, cols: int, seed: int = 11) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {"id": np.arange(rows).astype(str)}
+    for i in range(1, cols):
+        kind = i % 4
+        if kind == 0:
+            data[f"Amount_{i}"] = rng.uniform(0, 10000, rows).round(2)
+        elif kind == 1:
+            data[f"Created_{i}"] = np.datetime64("2024-01-01") + rng.integers(0, 86400 * 365, rows).astype("timedelta64[s]")
+        elif kind == 2:
+            data[f"Stage_{i}"] = np.asarray(["Won", "Lost", "Open", None], dtype=object)[rng.integers(0, 4, rows)]
+        else:
+            data[f"Text_{i}"] = [f"note {j % 1000}" for j in range(rows)]
+    return pd.DataFrame(data)
+
+
+def _metrics():
+    empty = pd.DataFrame(columns=["Lead_Source", "Count", "Percentage"])
+    return {
+        "summary": {"date_range": "bench", "total_contacts": 0, "total_accounts": 0, "total_deals": 0, "total_calls": 0, "total_meetings": 0},
+        "lead_source": empty, "industry_type": pd.DataFrame(),
+        "meetings": {"total_meetings": 0, "avg_meetings_per_day": 0},
+        "calls": {"total_calls": 0, "avg_calls_per_day": 0},
+        "lead_quality": {"total_leads": 0, "junk_leads": 0, "prospect_leads": 0, "qualified_leads": 0},
+        "quotes": {"total_quotes": 0, "total_quote_value": 0, "average_quote_value": 0},
+        "deals": {"total_deals": 0, "deals_won": 0, "win_rate": 0},
+    }
+
+
+def run_mode(mode: str, rows: int, cols: int):
+    from exporter import MetricsExporter
+    df = synthetic_module(rows, cols)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.xlsx")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok = MetricsExporter.create_excel({"Contacts": df}, _metrics(), path, streaming=(mode == "streaming"))
+        elapsed = time.perf_counter() - start
+        size_mb = os.path.getsize(path) / (1024 * 1024) if ok else 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:<10} ok={ok} time={elapsed:.1f}s peak_rss={peak:.0f}MB (frame+imports {baseline:.0f}MB) file={size_mb:.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--cols", type=int, default=200)
+    parser.add_argument("--mode", choices=["openpyxl", "streaming"])
+    args = parser.parse_args()
+    if args.mode:
+        return run_mode(args.mode, args.rows, args.cols)
+    for mode in ("openpyxl", "streaming"):
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_excel", "--mode", mode,
+                        "--rows", str(args.rows), "--cols", str(args.cols)], check=True)
+
+
+if __name__ == "__main__":
+    main()
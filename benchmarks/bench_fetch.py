@@ -0,0 +1,51 @@
+# benchmarks/bench_fetch.py
+"""
+Sequential vs concurrent fetch against a local stub server.
+
+    python -m benchmarks.bench_fetch
+"""
+import time
+from client import ZohoBiginClient
+from config import Config
+from benchmarks.stub_server import StubBiginServer
+
+MODULES = {"Contacts": 4000, "Accounts": 1200, "Pipelines": 2400, "Calls": 1600, "Events": 800, "Tasks": 600, "Notes": 1000}
+
+
+class _StaticToken:
+    def get_valid_token(self):
+        return "bench-token"
+
+    def refresh(self, stale_token=None):
+        return True
+
+
+def _config(concurrency: int):
+    cfg = Config()
+    cfg.FETCH_CONCURRENCY = concurrency
+    cfg.RATE_LIMIT_DELAY = 0.0
+    return cfg
+
+
+def run(concurrency: int, server: StubBiginServer):
+    cfg = _config(concurrency)
+    client = ZohoBiginClient(_StaticToken(), server.base_url, cfg)
+    start = time.perf_counter()
+    if concurrency > 1:
+        data = client.fetch_modules_concurrent(list(MODULES))
+    else:
+        data = {m: client.fetch_module_data(m) for m in MODULES}
+    return time.perf_counter() - start, data
+
+
+def main():
+    with StubBiginServer(MODULES, latency=0.05) as server:
+        seq_time, seq_data = run(1, server)
+        for concurrency in (4, 8, 16):
+            conc_time, conc_data = run(concurrency, server)
+            assert conc_data == seq_data, "concurrent output differs from sequential"
+            print(f"concurrency={concurrency:<3} sequential={seq_time:.2f}s concurrent={conc_time:.2f}s speedup={seq_time / conc_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# benchmarks/bench_flatten.py
+"""
+Records/sec of per-record flatten_dict vs the column-wise flatten_records.
+
+    python -m benchmarks.bench_flatten --records 200000
+"""
+import argparse
+import time
+import pandas as pd
+from data_processor import DataProcessor
+from benchmarks.bench_memory import synthetic_pages
+
+
+def legacy(page):
+    return pd.DataFrame([DataProcessor.flatten_dict(r) for r in page])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=200_000)
+    args = parser.parse_args()
+    pages = list(synthetic_pages(args.records))
+
+    for page in pages[:5]:
+        pd.testing.assert_frame_equal(legacy(page), DataProcessor.flatten_records(page))
+
+    for label, fn in (("flatten_dict", legacy), ("flatten_records", DataProcessor.flatten_records)):
+        start = time.perf_counter()
+        for page in pages:
+            fn(page)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<16} {args.records / elapsed:>10,.0f} records/sec")
+
+
+if __name__ == "__main__":
+    main()
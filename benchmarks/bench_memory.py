@@ -0,0 +1,63 @@
+# benchmarks/bench_memory.py
+"""
+Peak RSS of the legacy list-of-dicts build vs the streaming page pipeline on a
+synthetic module. Each mode runs in its own subprocess so peaks don't overlap.
+
+    python -m benchmarks.bench_memory --records 500000
+"""
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+
+def synthetic_pages(records: int, per_page: int = 200):
+    for start in range(0, records, per_page):
+        yield [
+            {
+                "id": str(4_000_000_000 + i),
+                "Last_Name": f"Contact {i}",
+                "Email": f"user{i}@example.com",
+                "Lead_Source": ("Web", "Referral", "Cold Call", "Trade Show")[i % 4],
+                "Created_Time": "2024-01-15T10:30:00+05:30",
+                "Modified_Time": "2024-02-01T08:00:00+05:30",
+                "Owner": {"id": str(i % 25), "name": f"Owner {i % 25}", "email": f"owner{i % 25}@example.com"},
+                "Account_Name": {"id": str(i % 5000), "name": f"Account {i % 5000}"},
+                "Tag": [{"name": "vip", "id": "1"}] if i % 10 == 0 else [],
+                "Description": None,
+            }
+            for i in range(start, min(start + per_page, records))
+        ]
+
+
+def run_mode(mode: str, records: int):
+    import pandas as pd
+    from data_processor import DataProcessor
+
+    start = time.perf_counter()
+    if mode == "legacy":
+        all_records = [r for page in synthetic_pages(records) for r in page]
+        df = pd.DataFrame([DataProcessor.flatten_dict(r) for r in all_records])
+        df = DataProcessor.clean_column_names(df)
+        df = DataProcessor.remove_all_timezones(df)
+    else:
+        df = DataProcessor.normalize_datetimes(DataProcessor.frame_from_pages(synthetic_pages(records)))
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:<10} rows={len(df):<8} time={elapsed:.1f}s peak_rss={peak_mb:.0f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--mode", choices=["legacy", "streaming"])
+    args = parser.parse_args()
+    if args.mode:
+        return run_mode(args.mode, args.records)
+    for mode in ("legacy", "streaming"):
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_memory", "--mode", mode, "--records", str(args.records)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_metrics.py
+"""
+MetricsCalculator with shared intermediates vs re-parsing and re-filtering per
+metric (the previous behaviour) on synthetic module frames.
+
+    python -m benchmarks.bench_metrics --rows 2000000
+"""
+import argparse
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from metrics import MetricsCalculator
+
+
+class _Config:
+    MONTH_START = datetime(2024, 3, 1)
+    MONTH_END = datetime(2024, 3, 31, 23, 59, 59)
+
+
+def _created_times(rng, n):
+    base = np.datetime64("2024-01-01T00:00:00")
+    offsets = rng.integers(0, 120 * 86400, n).astype("timedelta64[s]")
+    return pd.Series((base + offsets).astype(str)).str.cat(["+05:30"] * n)
+
+
+def synthetic_data_store(rows: int, seed: int = 7) -> dict:
+    rng = np.random.default_rng(seed)
+    pick = lambda values, n: np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+    n_contacts, n_deals, n_small = rows, rows // 2, rows // 4
+    return {
+        "Contacts": pd.DataFrame({
+            "id": np.arange(n_contacts).astype(str),
+            "Lead_Source": pick(["Web", "Referral", "Cold Call", "Trade Show", None], n_contacts),
+            "Lead_Status": pick(["Junk Lead", "Prospect", "Qualified", "Nurture", "Contacted"], n_contacts),
+            "Created_Time": _created_times(rng, n_contacts),
+        }),
+        "Accounts": pd.DataFrame({
+            "id": np.arange(n_small).astype(str),
+            "Industry": pick(["Retail", "Manufacturing", "Services", "Technology"], n_small),
+            "Created_Time": _created_times(rng, n_small),
+        }),
+        "Pipelines": pd.DataFrame({
+            "id": np.arange(n_deals).astype(str),
+            "Stage": pick(["Qualification", "Proposal/Price Quote", "Closed Won", "Closed Lost", "Negotiation"], n_deals),
+            "Amount": rng.uniform(100, 50000, n_deals).round(2),
+            "Created_Time": _created_times(rng, n_deals),
+        }),
+        "Calls": pd.DataFrame({"id": np.arange(n_small).astype(str), "Created_Time": _created_times(rng, n_small)}),
+        "Events": pd.DataFrame({"id": np.arange(n_small).astype(str), "Created_Time": _created_times(rng, n_small)}),
+        "Tasks": pd.DataFrame({
+            "id": np.arange(n_small).astype(str),
+            "Subject": pick(["Send email", "Follow up call", "Mail brochure", "Demo"], n_small),
+            "Created_Time": _created_times(rng, n_small),
+        }),
+    }
+
+
+class _PerMetricCalculator(MetricsCalculator):
+    """Drops the shared intermediates so every metric re-parses and re-filters."""
+    def _get_filtered(self, module):
+        return self._filter_by_date(self._get_dataframe(module))
+
+    def _contains(self, module, col, pattern):
+        df = self._get_filtered(module)
+        return df[col].astype(str).str.lower().str.contains(pattern, na=False, regex=True)
+
+
+def _run(cls, data):
+    import contextlib, io
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        metrics = cls(data, _Config()).calculate_all_metrics()
+    return time.perf_counter() - start, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+    data = synthetic_data_store(args.rows)
+
+    before, expected = _run(_PerMetricCalculator, data)
+    after, actual = _run(MetricsCalculator, data)
+    assert repr(expected) == repr(actual), "metrics differ"
+    print(f"rows={args.rows:,} per-metric={before:.2f}s shared={after:.2f}s speedup={before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
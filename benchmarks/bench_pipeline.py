@@ -0,0 +1,70 @@
+# benchmarks/bench_pipeline.py
+"""
+Phased run (fetch all → metrics → export) vs the staged --pipeline run against the
+local stub server, writing a streaming workbook in both cases.
+
+    python -m benchmarks.bench_pipeline
+"""
+import os
+import tempfile
+import time
+from client import ZohoBiginClient
+from config import Config
+from export_backends import ExcelBackend, run_exports
+from main import make_to_frame
+from metrics import MetricsCalculator
+from pipeline import ReportPipeline
+from benchmarks.bench_fetch import _StaticToken
+from benchmarks.stub_server import StubBiginServer
+
+MODULES = {"Contacts": 6000, "Accounts": 2000, "Pipelines": 4000, "Calls": 3000, "Events": 2000, "Tasks": 2000, "Notes": 12000}
+
+
+def _config():
+    cfg = Config()
+    cfg.FETCH_CONCURRENCY = 8
+    cfg.RATE_LIMIT_DELAY = 0.0
+    cfg.RECORD_CACHE_ENABLED = False
+    cfg.MODULES_TO_FETCH = list(MODULES)
+    return cfg
+
+
+def phased(server, out_dir):
+    cfg = _config()
+    client = ZohoBiginClient(_StaticToken(), server.base_url, cfg)
+    start = time.perf_counter()
+    data = client.fetch_modules_concurrent(cfg.MODULES_TO_FETCH, to_frame=make_to_frame(cfg))
+    data = {m: df for m, df in data.items() if not df.empty}
+    metrics = MetricsCalculator(data, cfg).calculate_all_metrics()
+    run_exports([ExcelBackend(out_dir, streaming=True)], data, metrics)
+    return time.perf_counter() - start, data, metrics
+
+
+def pipelined(server, out_dir):
+    cfg = _config()
+    client = ZohoBiginClient(_StaticToken(), server.base_url, cfg)
+
+    def fetch_module(module, to_frame, pool):
+        return client.fetch_module_frame(module, to_frame, pool=pool)
+
+    start = time.perf_counter()
+    pipeline = ReportPipeline(cfg.MODULES_TO_FETCH, fetch_module, make_to_frame(cfg),
+                              [ExcelBackend(out_dir, streaming=True)], cfg)
+    data, metrics = pipeline.run()
+    return time.perf_counter() - start, data, metrics
+
+
+def main():
+    with StubBiginServer(MODULES, latency=0.05) as server, tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "a"))
+        os.makedirs(os.path.join(tmp, "b"))
+        t_phased, d_phased, m_phased = phased(server, os.path.join(tmp, "a"))
+        t_pipe, d_pipe, m_pipe = pipelined(server, os.path.join(tmp, "b"))
+        for module, df in d_phased.items():
+            assert df.equals(d_pipe[module]), f"{module} differs between phased and pipelined runs"
+        assert m_phased["summary"] == m_pipe["summary"], "metrics differ"
+        print(f"phased={t_phased:.2f}s pipelined={t_pipe:.2f}s speedup={t_phased / t_pipe:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_timezones.py
+"""
+Previous first-value-sniffing remove_all_timezones vs normalize_datetimes on a
+wide frame, with and without field metadata.
+
+    python -m benchmarks.bench_timezones --rows 50000 --cols 200
+"""
+import argparse
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from data_processor import DataProcessor
+
+
+def legacy_remove_all_timezones(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            sample = df[col].dropna().head(1)
+            if not sample.empty:
+                sample_val = str(sample.iloc[0])
+                if any(x in sample_val for x in ['T', 'Z', '+', '-']) and ':' in sample_val:
+                    try:
+                        df[col] = pd.to_datetime(df[col], errors='coerce', utc=True).dt.tz_localize(None)
+                    except Exception:
+                        pass
+    return df
+
+
+def wide_frame(rows: int, cols: int, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    base = np.datetime64("2024-01-01T00:00:00")
+    data, types = {}, {}
+    for i in range(cols):
+        kind = i % 10
+        if kind == 0:
+            ts = (base + rng.integers(0, 365 * 86400, rows).astype("timedelta64[s]")).astype(str)
+            data[f"Time_{i}"] = pd.Series(ts, dtype=object) + "+05:30"
+            types[f"Time_{i}"] = "datetime"
+        elif kind == 1:
+            data[f"Note_{i}"] = pd.Series([f"Call - follow up: {h % 24:02d}:30" for h in range(rows)], dtype=object)
+            types[f"Note_{i}"] = "textarea"
+        else:
+            data[f"Text_{i}"] = pd.Series([f"value {j % 97}" for j in range(rows)], dtype=object)
+            types[f"Text_{i}"] = "text"
+    return pd.DataFrame(data), types
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - start, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--cols", type=int, default=200)
+    args = parser.parse_args()
+    df, types = wide_frame(args.rows, args.cols)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        legacy_t, legacy = _time(legacy_remove_all_timezones, df)
+    sniff_t, sniffed = _time(DataProcessor.normalize_datetimes, df, {})
+    typed_t, typed = _time(DataProcessor.normalize_datetimes, df, types)
+    mangled = [c for c in df.columns if c.startswith("Note_") and legacy[c].isna().all()]
+    print(f"legacy={legacy_t:.2f}s untyped={sniff_t:.2f}s typed={typed_t:.2f}s")
+    print(f"text columns turned into NaT: legacy={len(mangled)} "
+          f"untyped={sum(sniffed[c].dtype.kind == 'M' for c in df.columns if c.startswith('Note_'))} "
+          f"typed={sum(typed[c].dtype.kind == 'M' for c in df.columns if c.startswith('Note_'))}")
+
+
+if __name__ == "__main__":
+    main()
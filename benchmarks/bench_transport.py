@@ -0,0 +1,61 @@
+# benchmarks/bench_transport.py
+"""
+Per-page transport costs against the local simulator:
+
+  decode   resp.json() vs transport.decode_json on a 200-record Contacts page
+  fetch    default requests.Session() vs transport.make_session() at high
+           concurrency (connections opened, wire bytes with gzip, time per page)
+
+    python -m benchmarks.bench_transport
+"""
+import json
+import time
+import requests
+import transport
+from client import ZohoBiginClient
+from benchmarks.bench_fetch import _StaticToken, _config
+from benchmarks.datagen import RecordGenerator
+from benchmarks.stub_server import StubBiginServer
+
+MODULES = {"Contacts": 6000, "Pipelines": 3000, "Calls": 2000, "Notes": 2000}
+
+
+def bench_decode(iterations: int = 300):
+    page = {"data": RecordGenerator().records("Contacts", 200), "info": {"more_records": True}}
+    resp = requests.models.Response()
+    resp._content = json.dumps(page).encode()
+    resp.encoding = "UTF-8"
+    resp.status_code = 200
+    results = {}
+    for name, decode in (("resp.json()", requests.models.Response.json), ("decode_json", transport.decode_json)):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            decode(resp)
+        results[name] = (time.perf_counter() - start) / iterations
+    decoder = "orjson" if transport.orjson is not None else "json"
+    print(f"decode ({len(resp._content) / 1024:.0f}KB page, decode_json via {decoder}): "
+          + "  ".join(f"{k}={v * 1e3:.2f}ms" for k, v in results.items())
+          + f"  speedup={results['resp.json()'] / results['decode_json']:.2f}x")
+
+
+def bench_fetch(concurrency: int = 16):
+    pages = sum(-(-n // 200) for n in MODULES.values())
+    for label, session_factory, gz in (("default session", requests.Session, False),
+                                       ("tuned session", lambda: transport.make_session(concurrency), False),
+                                       ("tuned + gzip", lambda: transport.make_session(concurrency), True)):
+        with StubBiginServer(MODULES, latency=0.02, generator=RecordGenerator(), gzip=gz) as server:
+            client = ZohoBiginClient(_StaticToken(), server.base_url, _config(concurrency), session=session_factory())
+            start = time.perf_counter()
+            client.fetch_modules_concurrent(list(MODULES))
+            elapsed = time.perf_counter() - start
+            print(f"fetch {label:<16} {elapsed / pages * 1e3:6.2f}ms/page  connections={server.stats['connections']:<4} "
+                  f"wire={server.stats['bytes_sent'] / 1e6:.1f}MB")
+
+
+def main():
+    bench_decode()
+    bench_fetch()
+
+
+if __name__ == "__main__":
+    main()
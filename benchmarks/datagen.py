@@ -0,0 +1,206 @@
+# benchmarks/datagen.py
+"""
+Seeded generator of Bigin-shaped records and matching settings/fields metadata:
+owner and account/contact lookups as nested objects, tag and participant lists,
+timestamps with +05:30 offsets, picklists, currency and long text. The same seed
+always produces the same data, so benchmark runs are comparable.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+LEAD_SOURCES = ["Web", "Referral", "Cold Call", "Trade Show", "Advertisement", "Partner", None]
+LEAD_STATUSES = ["Junk Lead", "Prospect", "Qualified", "Nurture", "Contacted", "Not Contacted"]
+INDUSTRIES = ["Retail", "Manufacturing", "Services", "Technology", "Healthcare", "Education", None]
+STAGES = ["Qualification", "Needs Analysis", "Proposal/Price Quote", "Negotiation/Review", "Closed Won", "Closed Lost"]
+TASK_SUBJECTS = ["Send email", "Follow up call", "Mail brochure", "Demo", "Send quotation", "Check in"]
+TASK_STATUSES = ["Not Started", "In Progress", "Completed", "Deferred"]
+CITIES = ["Chennai", "Bengaluru", "Mumbai", "Pune", "Hyderabad", "Delhi", "Kochi"]
+TAGS = ["VIP", "Renewal", "Expo 2024", "Newsletter", "Partner"]
+WORDS = ("quarterly review pricing follow up shipment invoice discount renewal onboarding demo "
+         "requirements contract proposal feedback support escalation timeline budget").split()
+
+# api_name, data_type, json_type, lookup module
+FIELDS = {
+    "Contacts": [
+        ("First_Name", "text", "string", None), ("Last_Name", "text", "string", None),
+        ("Email", "email", "string", None), ("Mobile", "phone", "string", None), ("Title", "text", "string", None),
+        ("Lead_Source", "picklist", "string", None), ("Lead_Status", "picklist", "string", None),
+        ("Owner", "ownerlookup", "jsonobject", "users"), ("Account_Name", "lookup", "jsonobject", "Accounts"),
+        ("Mailing_City", "text", "string", None), ("Email_Opt_Out", "boolean", "boolean", None),
+        ("Tag", "tag", "jsonarray", None), ("Description", "textarea", "string", None),
+        ("Created_Time", "datetime", "string", None), ("Modified_Time", "datetime", "string", None),
+    ],
+    "Accounts": [
+        ("Account_Name", "text", "string", None), ("Industry", "picklist", "string", None),
+        ("Phone", "phone", "string", None), ("Website", "website", "string", None),
+        ("Billing_City", "text", "string", None), ("Owner", "ownerlookup", "jsonobject", "users"),
+        ("Tag", "tag", "jsonarray", None),
+        ("Created_Time", "datetime", "string", None), ("Modified_Time", "datetime", "string", None),
+    ],
+    "Pipelines": [
+        ("Deal_Name", "text", "string", None), ("Stage", "picklist", "string", None),
+        ("Amount", "currency", "double", None), ("Closing_Date", "date", "string", None),
+        ("Account_Name", "lookup", "jsonobject", "Accounts"), ("Contact_Name", "lookup", "jsonobject", "Contacts"),
+        ("Owner", "ownerlookup", "jsonobject", "users"), ("Sub_Pipeline", "picklist", "string", None),
+        ("Lead_Source", "picklist", "string", None), ("Tag", "tag", "jsonarray", None),
+        ("Created_Time", "datetime", "string", None), ("Modified_Time", "datetime", "string", None),
+    ],
+    "Calls": [
+        ("Subject", "text", "string", None), ("Call_Type", "picklist", "string", None),
+        ("Call_Start_Time", "datetime", "string", None), ("Call_Duration_in_seconds", "integer", "integer", None),
+        ("Related_To", "lookup", "jsonobject", "Contacts"), ("Owner", "ownerlookup", "jsonobject", "users"),
+        ("Created_Time", "datetime", "string", None), ("Modified_Time", "datetime", "string", None),
+    ],
+    "Events": [
+        ("Event_Title", "text", "string", None), ("Start_DateTime", "datetime", "string", None),
+        ("End_DateTime", "datetime", "string", None), ("All_day", "boolean", "boolean", None),
+        ("Venue", "text", "string", None), ("Participants", "multiselectlookup", "jsonarray", None),
+        ("Related_To", "lookup", "jsonobject", "Contacts"), ("Owner", "ownerlookup", "jsonobject", "users"),
+        ("Created_Time", "datetime", "string", None), ("Modified_Time", "datetime", "string", None),
+    ],
+    "Tasks": [
+        ("Subject", "text", "string", None), ("Due_Date", "date", "string", None),
+        ("Status", "picklist", "string", None), ("Priority", "picklist", "string", None),
+        ("Related_To", "lookup", "jsonobject", "Contacts"), ("Owner", "ownerlookup", "jsonobject", "users"),
+        ("Created_Time", "datetime", "string", None), ("Modified_Time", "datetime", "string", None),
+    ],
+    "Notes": [
+        ("Note_Title", "text", "string", None), ("Note_Content", "textarea", "string", None),
+        ("Parent_Id", "lookup", "jsonobject", "Contacts"), ("Owner", "ownerlookup", "jsonobject", "users"),
+        ("Created_Time", "datetime", "string", None), ("Modified_Time", "datetime", "string", None),
+    ],
+}
+
+
+def fields_for(module: str) -> List[Dict]:
+    """settings/fields payload for a module, in Bigin's shape."""
+    out = []
+    for i, (api_name, data_type, json_type, lookup) in enumerate(FIELDS.get(module, [])):
+        field = {"api_name": api_name, "field_label": api_name.replace("_", " "), "id": f"{module[:3]}{i:04d}",
+                 "data_type": data_type, "json_type": json_type, "custom_field": False, "visible": True}
+        if lookup:
+            field["lookup"] = {"module": {"api_name": lookup, "id": f"mod-{lookup}"}}
+        out.append(field)
+    return out
+
+
+class RecordGenerator:
+    def __init__(self, seed: int = 7, start: datetime = datetime(2024, 1, 1), days: int = 120,
+                 owners: int = 12, accounts: int = 500, contacts: int = 5000):
+        self.rng = random.Random(seed)
+        self.start = start
+        self.days = days
+        self.owners = [{"name": f"Owner {i}", "id": f"48000000{i:05d}", "email": f"owner{i}@example.com"}
+                       for i in range(owners)]
+        self.accounts = accounts
+        self.contacts = contacts
+
+    def _time(self) -> datetime:
+        return self.start + timedelta(seconds=self.rng.randrange(self.days * 86400))
+
+    @staticmethod
+    def _iso(t: datetime) -> str:
+        return t.strftime("%Y-%m-%dT%H:%M:%S") + "+05:30"
+
+    def _text(self, words: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(words))
+
+    def _lookup(self, module: str, limit: int):
+        i = self.rng.randrange(limit)
+        return {"name": f"{module[:-1]} {i}", "id": f"{module[:3].upper()}{i:08d}"}
+
+    def _common(self, module: str, i: int) -> dict:
+        created = self._time()
+        return {
+            "id": f"{module[:3].upper()}{i:08d}",
+            "Owner": self.rng.choice(self.owners),
+            "Created_Time": self._iso(created),
+            "Modified_Time": self._iso(created + timedelta(minutes=self.rng.randrange(0, 20000))),
+            "Created_By": self.owners[0],
+            "$editable": True,
+            "$approval": {"delegate": False, "approve": False, "reject": False, "resubmit": False},
+        }
+
+    def _tags(self):
+        return [{"name": t, "id": f"tag-{TAGS.index(t)}"} for t in self.rng.sample(TAGS, self.rng.randrange(0, 3))]
+
+    def contact(self, i: int) -> dict:
+        r = self._common("Contacts", i)
+        r.update({
+            "First_Name": f"First{i}", "Last_Name": f"Last{i}", "Email": f"contact{i}@example.com",
+            "Mobile": f"+91 9{self.rng.randrange(10**8, 10**9)}", "Title": self.rng.choice(["CEO", "Manager", "Buyer", None]),
+            "Lead_Source": self.rng.choice(LEAD_SOURCES), "Lead_Status": self.rng.choice(LEAD_STATUSES),
+            "Account_Name": self._lookup("Accounts", self.accounts) if self.rng.random() < 0.8 else None,
+            "Mailing_City": self.rng.choice(CITIES), "Email_Opt_Out": self.rng.random() < 0.1,
+            "Tag": self._tags(), "Description": self._text(12) if self.rng.random() < 0.3 else None,
+        })
+        return r
+
+    def account(self, i: int) -> dict:
+        r = self._common("Accounts", i)
+        r.update({
+            "Account_Name": f"Account {i}", "Industry": self.rng.choice(INDUSTRIES),
+            "Phone": f"+91 44 {self.rng.randrange(10**7, 10**8)}", "Website": f"https://account{i}.example.com",
+            "Billing_City": self.rng.choice(CITIES), "Tag": self._tags(),
+        })
+        return r
+
+    def pipeline(self, i: int) -> dict:
+        r = self._common("Pipelines", i)
+        r.update({
+            "Deal_Name": f"Deal {i}", "Stage": self.rng.choice(STAGES),
+            "Amount": round(self.rng.uniform(500, 250000), 2),
+            "Closing_Date": (self._time() + timedelta(days=30)).strftime("%Y-%m-%d"),
+            "Account_Name": self._lookup("Accounts", self.accounts),
+            "Contact_Name": self._lookup("Contacts", self.contacts),
+            "Pipeline": {"name": "Sales Pipeline Standard", "id": "PIPE0001"},
+            "Sub_Pipeline": "Sales Pipeline Standard", "Lead_Source": self.rng.choice(LEAD_SOURCES), "Tag": self._tags(),
+        })
+        return r
+
+    def call(self, i: int) -> dict:
+        r = self._common("Calls", i)
+        r.update({
+            "Subject": f"Call about {self.rng.choice(WORDS)}", "Call_Type": self.rng.choice(["Outbound", "Inbound"]),
+            "Call_Start_Time": self._iso(self._time()), "Call_Duration_in_seconds": self.rng.randrange(20, 3600),
+            "Related_To": self._lookup("Contacts", self.contacts), "$se_module": "Contacts",
+        })
+        return r
+
+    def event(self, i: int) -> dict:
+        r = self._common("Events", i)
+        start = self._time()
+        participants = [dict(self._lookup("Contacts", self.contacts), type="contact", status="not_known")
+                        for _ in range(self.rng.randrange(1, 4))]
+        r.update({
+            "Event_Title": f"Meeting: {self._text(3)}", "Start_DateTime": self._iso(start),
+            "End_DateTime": self._iso(start + timedelta(minutes=self.rng.choice([30, 60, 90]))),
+            "All_day": False, "Venue": self.rng.choice(CITIES + [None]), "Participants": participants,
+            "Related_To": self._lookup("Contacts", self.contacts), "$se_module": "Contacts",
+        })
+        return r
+
+    def task(self, i: int) -> dict:
+        r = self._common("Tasks", i)
+        r.update({
+            "Subject": self.rng.choice(TASK_SUBJECTS), "Due_Date": self._time().strftime("%Y-%m-%d"),
+            "Status": self.rng.choice(TASK_STATUSES), "Priority": self.rng.choice(["High", "Normal", "Low"]),
+            "Related_To": self._lookup("Contacts", self.contacts), "$se_module": "Contacts",
+        })
+        return r
+
+    def note(self, i: int) -> dict:
+        r = self._common("Notes", i)
+        parent = self._lookup("Contacts", self.contacts)
+        parent["module"] = {"api_name": "Contacts", "id": "mod-Contacts"}
+        r.update({"Note_Title": self._text(4), "Note_Content": self._text(60), "Parent_Id": parent})
+        return r
+
+    def records(self, module: str, count: int) -> List[dict]:
+        make = {"Contacts": self.contact, "Accounts": self.account, "Pipelines": self.pipeline, "Calls": self.call,
+                "Events": self.event, "Tasks": self.task, "Notes": self.note}[module]
+        return [make(i) for i in range(count)]
+
+    def dataset(self, counts: Dict[str, int]) -> Dict[str, List[dict]]:
+        return {module: self.records(module, n) for module, n in counts.items()}
@@ -0,0 +1,198 @@
+# benchmarks/harness.py
+"""
+End-to-end benchmark against the local API simulator, stage by stage:
+
+    fetch      client + TokenManager + RateLimiter against the simulator (OAuth,
+               optional 429/401 injection, realistic nested records)
+    transform  flatten/clean/normalise each module into a frame
+    metrics    MetricsCalculator over the frames
+    export     streaming workbook + Parquet into a temp directory
+
+Each stage reports wall time, records/s, p50/p95 of its unit of work (HTTP
+request, page flatten, metric, module export) and peak RSS. Results can be
+saved with --json and compared with --baseline; a stage whose throughput drops
+or peak memory grows by more than --tolerance fails the run.
+
+    python -m benchmarks.harness --records 20000 --inject-429 50 --revoke-every 300
+    python -m benchmarks.harness --json bench.json
+    python -m benchmarks.harness --baseline bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+import instrumentation
+from client import ZohoBiginClient
+from config import Config
+from data_processor import DataProcessor
+from export_backends import ExcelBackend, ParquetBackend, run_exports
+from metrics import MetricsCalculator
+from rate_limiter import RateLimiter
+from token_manager import TokenManager
+from benchmarks.datagen import RecordGenerator
+from benchmarks.stub_server import StubBiginServer
+
+# Share of --records per module, roughly a mid-sized Bigin org.
+MODULE_SHARE = {"Contacts": 0.35, "Accounts": 0.08, "Pipelines": 0.15, "Calls": 0.12, "Events": 0.08,
+                "Tasks": 0.1, "Notes": 0.12}
+
+
+class _MemoryTokenStore:
+    """Stands in for the zoho_tokens table: starts with only a refresh token."""
+    def __init__(self):
+        self.row = {"service": "bench", "access_token": None, "refresh_token": "bench-refresh", "expires_at": None}
+
+    def get_token_row(self, service):
+        return dict(self.row)
+
+    def upsert_token(self, service, access_token, refresh_token=None, expires_at=None):
+        self.row.update(access_token=access_token, refresh_token=refresh_token or self.row["refresh_token"],
+                        expires_at=expires_at)
+
+
+def _config(server, concurrency: int):
+    cfg = Config()
+    cfg.BASE_URL = server.base_url
+    cfg.TOKEN_URL = server.token_url
+    cfg.FETCH_CONCURRENCY = concurrency
+    cfg.RATE_LIMIT_DELAY = 0.0
+    cfg.BULK_READ_THRESHOLD = 0
+    cfg.MAX_RETRIES = max(cfg.MAX_RETRIES, 6)
+    cfg.MODULES_TO_FETCH = list(MODULE_SHARE)
+    cfg.MONTH_START = datetime(2024, 1, 1)
+    cfg.MONTH_END = datetime(2024, 4, 30, 23, 59, 59)
+    return cfg
+
+
+def _stage(name: str, records: int, unit: str, fn, *args):
+    """Runs fn(*args) with fresh instrumentation; returns (result, stage report)."""
+    instrumentation.enable()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args)
+    wall = time.perf_counter() - start
+    snap = instrumentation.snapshot()
+    instrumentation.disable()
+    units = [t for n, t in snap["timers"].items()
+             if n == unit or (n.startswith(unit + ".") and n != f"{unit}.total")]
+    report = {
+        "wall_s": round(wall, 3),
+        "records_per_s": round(records / wall, 1) if wall else None,
+        "unit": unit,
+        "unit_count": sum(t["count"] for t in units),
+        "p50_s": max((t["p50_s"] for t in units), default=None),
+        "p95_s": max((t["p95_s"] for t in units), default=None),
+        "peak_rss_mb": snap["peak_rss_mb"],
+        "counters": {k: v for k, v in snap["counters"].items() if not k.startswith("records.")},
+    }
+    return result, report
+
+
+def run(args) -> dict:
+    counts = {m: max(1, int(args.records * share)) for m, share in MODULE_SHARE.items()}
+    total = sum(counts.values())
+    generator = RecordGenerator(seed=args.seed, contacts=counts["Contacts"], accounts=counts["Accounts"])
+    report = {"generated_at": datetime.now().isoformat(timespec="seconds"), "python": sys.version.split()[0],
+              "params": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")}, "stages": {}}
+
+    with StubBiginServer(counts, latency=args.latency, jitter=args.jitter, generator=generator,
+                         inject_429_every=args.inject_429, retry_after=args.retry_after,
+                         auth=True, revoke_every=args.revoke_every) as server:
+        cfg = _config(server, args.concurrency)
+        limiter = RateLimiter.from_config(cfg)
+        tm = TokenManager(cfg, _MemoryTokenStore(), service_name="bench")
+        client = ZohoBiginClient(tm, cfg.BASE_URL, cfg, rate_limiter=limiter)
+
+        raw, report["stages"]["fetch"] = _stage(
+            "fetch", total, "http.GET", lambda: client.fetch_modules_concurrent(cfg.MODULES_TO_FETCH))
+        failed = next((v for v in raw.values() if isinstance(v, Exception)), None)
+        if failed is not None:
+            raise SystemExit(f"fetch failed: {failed}")
+        fetched = sum(len(v) for v in raw.values())
+        if fetched != total:
+            raise SystemExit(f"fetch returned {fetched} of {total} records")
+        report["simulator"] = dict(server.stats, requests=server.request_count)
+
+        def transform(raw):
+            frames = {}
+            for module, records in raw.items():
+                step = cfg.RECORDS_PER_PAGE
+                df = DataProcessor.frame_from_pages(records[i:i + step] for i in range(0, len(records), step))
+                df.attrs["field_types"] = DataProcessor.column_types(client.get_module_schema(module))
+                frames[module] = DataProcessor.normalize_datetimes(df)
+            return frames
+
+        frames, report["stages"]["transform"] = _stage("transform", total, "transform.flatten", transform, raw)
+        del raw
+        metrics, report["stages"]["metrics"] = _stage(
+            "metrics", total, "metrics", lambda: MetricsCalculator(frames, cfg).calculate_all_metrics())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            backends = [ExcelBackend(tmp, streaming=True), ParquetBackend(tmp)]
+            _, report["stages"]["export"] = _stage(
+                "export", total, "export", lambda: run_exports(backends, frames, metrics))
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for stage, now in report["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before:
+            continue
+        if before.get("records_per_s") and now["records_per_s"] < before["records_per_s"] * (1 - tolerance):
+            regressions.append(f"{stage}: {now['records_per_s']:.0f} records/s vs {before['records_per_s']:.0f} baseline")
+        if before.get("peak_rss_mb") and now["peak_rss_mb"] > before["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{stage}: peak RSS {now['peak_rss_mb']}MB vs {before['peak_rss_mb']}MB baseline")
+    return regressions
+
+
+def print_report(report: dict):
+    print(f"{'stage':<10} {'wall s':>8} {'records/s':>11} {'unit':>18} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'peak MB':>8}")
+    for stage, r in report["stages"].items():
+        p50 = f"{r['p50_s'] * 1000:.1f}" if r["p50_s"] is not None else "-"
+        p95 = f"{r['p95_s'] * 1000:.1f}" if r["p95_s"] is not None else "-"
+        print(f"{stage:<10} {r['wall_s']:>8.2f} {r['records_per_s']:>11.0f} {r['unit']:>18} {r['unit_count']:>6} "
+              f"{p50:>8} {p95:>8} {r['peak_rss_mb']:>8}")
+    print(f"simulator: {report['simulator']}")
+    print(f"client:    {report['stages']['fetch']['counters']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the report stages against the local API simulator.")
+    parser.add_argument("--records", type=int, default=20000, help="Total records across all modules.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated per-request latency (s).")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Extra uniform random latency (s).")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--inject-429", type=int, default=0, metavar="N", help="Every Nth request returns 429.")
+    parser.add_argument("--retry-after", type=float, default=0.05)
+    parser.add_argument("--revoke-every", type=int, default=0, metavar="N",
+                        help="Revoke all tokens every N requests (forces 401 + refresh).")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON.")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against a previous --json report.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default 0.2).")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(report, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
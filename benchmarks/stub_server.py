@@ -0,0 +1,260 @@
+# benchmarks/stub_server.py
+import csv
+import gzip
+import io
+import itertools
+import json
+import random
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from benchmarks.datagen import fields_for
+
+
+def make_records(module: str, count: int):
+    return [
+        {
+            "id": f"{module}-{i}",
+            "Last_Name": f"Name {i}",
+            "Created_Time": "2024-01-15T10:30:00+05:30",
+            "Owner": {"id": f"owner-{i % 7}", "name": f"Owner {i % 7}"},
+        }
+        for i in range(count)
+    ]
+
+
+def bulk_csv_zip(records, job_id: str) -> bytes:
+    """Bulk Read result: a zip holding one CSV where lookups are reduced to their id."""
+    columns = list(dict.fromkeys(k for r in records for k in r))
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(["Id" if c == "id" else c for c in columns])
+    for r in records:
+        writer.writerow([(r.get(c) or {}).get("id") if isinstance(r.get(c), dict) else r.get(c) for c in columns])
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(f"{job_id}.csv", text.getvalue())
+    return buf.getvalue()
+
+
+class StubBiginServer:
+    """
+    Local simulator of the Bigin API: records, settings/fields, record count, Bulk
+    Read and the OAuth token endpoint, with per-request latency (plus optional
+    jitter). Bulk jobs report IN PROGRESS on the first poll and COMPLETED afterwards.
+
+    With a RecordGenerator, records and field metadata have realistic shapes
+    (nested lookups, lists, offsets); otherwise the minimal make_records() shape
+    is served and settings/fields is empty. Faults can be injected: every
+    inject_429_every-th API request gets a 429 with Retry-After, and with
+    auth=True only tokens issued by token_url are accepted and all of them are
+    revoked every revoke_every requests, so clients see 401s and must refresh.
+    Like Bigin, ?page= only reaches the first page_offset_limit records; every
+    page carries a next_page_token that continues past it. With fail_after=N,
+    record page requests after the Nth answer 500 (set it back to 0 to recover),
+    which simulates an outage midway through a module.
+    Connections are HTTP/1.1 keep-alive (stats["connections"] counts new ones),
+    and with gzip=True JSON bodies are compressed when the client accepts it.
+    """
+    def __init__(self, records_per_module: dict, latency: float = 0.05, per_page: int = 200,
+                 bulk_page_size: int = 200000, generator=None, jitter: float = 0.0,
+                 inject_429_every: int = 0, retry_after: float = 0.05, auth: bool = False,
+                 revoke_every: int = 0, token_ttl: int = 3600, gzip: bool = False,
+                 page_offset_limit: int = 2000, fail_after: int = 0):
+        if generator is not None:
+            self.data = generator.dataset(records_per_module)
+        else:
+            self.data = {m: make_records(m, n) for m, n in records_per_module.items()}
+        self.generator = generator
+        self.latency = latency
+        self.jitter = jitter
+        self.per_page = per_page
+        self.bulk_page_size = bulk_page_size
+        self.inject_429_every = inject_429_every
+        self.retry_after = retry_after
+        self.auth = auth
+        self.revoke_every = revoke_every
+        self.token_ttl = token_ttl
+        self.gzip = gzip
+        self.page_offset_limit = page_offset_limit
+        self.fail_after = fail_after
+        self.page_requests = 0
+        self.request_count = 0
+        self.stats = {"429": 0, "401": 0, "tokens_issued": 0, "connections": 0, "bytes_sent": 0}
+        self.tokens = set()
+        self.jobs = {}
+        self._job_ids = itertools.count(1)
+        self._token_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/bigin/v2"
+
+    @property
+    def token_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/oauth/v2/token"
+
+    def _issue_token(self) -> str:
+        with self._lock:
+            token = f"sim-token-{next(self._token_ids)}"
+            self.tokens.add(token)
+            self.stats["tokens_issued"] += 1
+        return token
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; without TCP_NODELAY keep-alive
+            # connections stall on delayed ACKs.
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.stats["connections"] += 1
+
+            def _begin(self) -> bool:
+                """Counts, delays and applies injected faults; False means a fault response was sent."""
+                with server._lock:
+                    server.request_count += 1
+                    n = server.request_count
+                    if server.revoke_every and n % server.revoke_every == 0:
+                        server.tokens.clear()
+                time.sleep(server.latency + (random.uniform(0, server.jitter) if server.jitter else 0))
+                if server.auth:
+                    token = self.headers.get("Authorization", "").rsplit(" ", 1)[-1]
+                    if token not in server.tokens:
+                        with server._lock:
+                            server.stats["401"] += 1
+                        self._send(401, {"code": "INVALID_TOKEN", "message": "invalid oauth token"})
+                        return False
+                if server.inject_429_every and n % server.inject_429_every == 0:
+                    with server._lock:
+                        server.stats["429"] += 1
+                    self._send(429, {"code": "TOO_MANY_REQUESTS"}, {"Retry-After": str(server.retry_after)})
+                    return False
+                return True
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if urlparse(self.path).path.endswith("/oauth/v2/token"):
+                    time.sleep(server.latency)
+                    return self._send(200, {"access_token": server._issue_token(), "expires_in": server.token_ttl,
+                                            "token_type": "Bearer", "api_domain": "http://127.0.0.1"})
+                if not self._begin():
+                    return
+                body = json.loads(body or b"{}")
+                if not urlparse(self.path).path.endswith("/bulk/read"):
+                    return self._send(404, {"code": "INVALID_URL_PATTERN"})
+                query = body.get("query", {})
+                job_id = str(next(server._job_ids))
+                with server._lock:
+                    server.jobs[job_id] = {"module": query["module"]["api_name"], "page": query.get("page", 1), "polls": 0}
+                self._send(201, {"data": [{"status": "success", "code": "ADDED_SUCCESSFULLY",
+                                           "details": {"id": job_id, "operation": "read", "state": "ADDED"}}]})
+
+            def _bulk(self, parts):
+                job = server.jobs.get(parts[0])
+                if job is None:
+                    return self._send(404, {"code": "INVALID_REQUEST"})
+                records = server.data[job["module"]]
+                size = server.bulk_page_size
+                chunk = records[(job["page"] - 1) * size: job["page"] * size]
+                if len(parts) == 2 and parts[1] == "result":
+                    body = bulk_csv_zip(chunk, parts[0])
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/zip")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                job["polls"] += 1
+                if job["polls"] < 2:
+                    return self._send(200, {"data": [{"id": parts[0], "state": "IN PROGRESS"}]})
+                result = {"page": job["page"], "count": len(chunk), "per_page": size,
+                          "more_records": job["page"] * size < len(records),
+                          "download_url": f"/bigin/v2/bulk/read/{parts[0]}/result"}
+                self._send(200, {"data": [{"id": parts[0], "state": "COMPLETED", "result": result}]})
+
+            def do_GET(self):
+                if not self._begin():
+                    return
+                parsed = urlparse(self.path)
+                qs = parse_qs(parsed.query)
+                parts = parsed.path.rstrip("/").split("/")
+                if "read" in parts and "bulk" in parts:
+                    return self._bulk(parts[parts.index("read") + 1:])
+                if parts[-2:] == ["actions", "count"]:
+                    records = server.data.get(parts[-3])
+                    if records is None:
+                        return self._send(404, {"code": "INVALID_MODULE"})
+                    return self._send(200, {"count": len(records)})
+                module = parts[-1]
+                if module == "fields":
+                    target = qs.get("module", [""])[0]
+                    return self._send(200, {"fields": fields_for(target) if server.generator else []})
+                records = server.data.get(module)
+                if records is None:
+                    return self._send(404, {"code": "INVALID_MODULE"})
+                with server._lock:
+                    server.page_requests += 1
+                    failing = server.fail_after and server.page_requests > server.fail_after
+                if failing:
+                    return self._send(500, {"code": "INTERNAL_ERROR"})
+                per_page = int(qs.get("per_page", [str(server.per_page)])[0])
+                if "page_token" in qs:
+                    token_module, offset = qs["page_token"][0].rsplit(":", 1)
+                    if token_module != module:
+                        return self._send(400, {"code": "INVALID_DATA", "message": "invalid page_token"})
+                    offset = int(offset)
+                    page = offset // per_page + 1
+                else:
+                    page = int(qs.get("page", ["1"])[0])
+                    offset = (page - 1) * per_page
+                    if server.page_offset_limit and offset + per_page > server.page_offset_limit:
+                        return self._send(400, {"code": "DISCRETE_PAGINATION_LIMIT_EXCEEDED",
+                                                "message": "use page_token to fetch beyond this limit"})
+                chunk = records[offset: offset + per_page]
+                if not chunk:
+                    return self._send(204, None)
+                more = offset + per_page < len(records)
+                info = {"page": page, "per_page": per_page, "more_records": more,
+                        "next_page_token": f"{module}:{offset + per_page}" if more else None,
+                        "page_token_expiry": "2099-01-01T00:00:00+00:00" if more else None}
+                self._send(200, {"data": chunk, "info": info})
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                if body and server.gzip and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=6)
+                    self.send_header("Content-Encoding", "gzip")
+                with server._lock:
+                    server.stats["bytes_sent"] += len(body)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+        return Handler
@@ -0,0 +1,118 @@
+# checkpoint.py
+"""
+Durable per-module fetch progress: the pagination cursor plus the pages already
+fetched, flushed to disk every few pages. A run that fails or is killed midway
+through a module resumes from the last flushed cursor instead of page 1.
+
+    <dir>/<module>/state.json          cursor, chunk files, record count
+    <dir>/<module>/chunk_00001.json    pages (lists of records) in fetch order
+"""
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+from transport import loads
+
+START = {"page": 1, "page_token": None, "expires": None}
+
+
+def _write_atomic(path: str, data: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+class ModuleCheckpoint:
+    """
+    Progress of one module fetch. The cursor only advances when a chunk is flushed,
+    so state.json always describes exactly the pages held in the chunk files.
+    """
+    def __init__(self, directory: str, module: str, key: str, flush_pages: int = 10):
+        self.path = os.path.join(directory, module)
+        self.module = module
+        self.key = key
+        self.flush_pages = max(1, flush_pages)
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self.cursor = dict(START)
+        self.chunks: List[str] = []
+        self.records = 0
+        self._pending: List[List[Dict]] = []
+        self._pending_cursor = None
+
+    def _load(self):
+        state_path = os.path.join(self.path, "state.json")
+        if not os.path.exists(state_path):
+            return
+        try:
+            with open(state_path, "rb") as fh:
+                state = loads(fh.read())
+        except (OSError, ValueError) as e:
+            print(f"    ⚠ {self.module}: unreadable checkpoint ({e}); starting over")
+            return self.discard()
+        if state.get("key") != self.key:
+            print(f"    ⚠ {self.module}: checkpoint is for a different fetch; starting over")
+            return self.discard()
+        if state["cursor"].get("page_token") and self._expired(state["cursor"].get("expires")):
+            print(f"    ⚠ {self.module}: checkpointed page_token expired; starting over")
+            return self.discard()
+        self.cursor, self.chunks, self.records = state["cursor"], state["chunks"], state["records"]
+        print(f"  ⏯ {self.module}: resuming after {self.records} checkpointed records")
+
+    @staticmethod
+    def _expired(expires: Optional[str]) -> bool:
+        if not expires:
+            return False
+        at = datetime.fromisoformat(expires)
+        return (at if at.tzinfo else at.replace(tzinfo=timezone.utc)) <= datetime.now(timezone.utc)
+
+    @property
+    def resumed(self) -> bool:
+        return bool(self.chunks)
+
+    def replay(self) -> Iterator[List[Dict]]:
+        """The checkpointed pages, in fetch order."""
+        for name in self.chunks:
+            with open(os.path.join(self.path, name), "rb") as fh:
+                yield from loads(fh.read())
+
+    def add(self, records: List[Dict], cursor: dict):
+        """Records one fetched page and the cursor of the page after it."""
+        self._pending.append(records)
+        self._pending_cursor = cursor
+        if len(self._pending) >= self.flush_pages:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        name = f"chunk_{len(self.chunks) + 1:05d}.json"
+        _write_atomic(os.path.join(self.path, name), json.dumps(self._pending))
+        self.chunks.append(name)
+        self.records += sum(len(page) for page in self._pending)
+        self.cursor = self._pending_cursor
+        self._pending = []
+        state = {"key": self.key, "cursor": self.cursor, "chunks": self.chunks, "records": self.records,
+                 "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+        _write_atomic(os.path.join(self.path, "state.json"), json.dumps(state))
+
+    def discard(self):
+        """Drops the checkpoint (after a complete fetch, or when it can't be resumed)."""
+        shutil.rmtree(self.path, ignore_errors=True)
+        self._reset()
+
+
+class CheckpointStore:
+    """Checkpoints for one service; a checkpoint only resumes the same kind of fetch."""
+    def __init__(self, directory: str, flush_pages: int = 10):
+        self.directory = directory
+        self.flush_pages = flush_pages
+
+    def open(self, module: str, modified_since: Optional[datetime] = None) -> ModuleCheckpoint:
+        key = modified_since.isoformat() if modified_since else "full"
+        return ModuleCheckpoint(self.directory, module, key, self.flush_pages)
@@ -2,6 +2,10 @@
 import os
 from datetime import datetime
 
+# Output formats understood by --formats (kept here so the CLI can validate them
+# without importing the export stack)
+EXPORT_FORMATS = ("xlsx", "parquet", "csv.gz", "sql")
+
 class Config:
     # -------------------------
     # OAuth / Zoho settings
@@ -24,15 +28,96 @@ class Config:
         "Contacts", "Accounts", "Pipelines", "Calls", "Events", "Tasks", "Notes"
     ]
 
-    # Date range (default: current month)
-    MONTH_START = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    MONTH_END = datetime.now()
 
     # API / request parameters
     RECORDS_PER_PAGE = int(os.getenv("ZOHO_RECORDS_PER_PAGE", 200))
     MAX_RETRIES = int(os.getenv("ZOHO_MAX_RETRIES", 3))
     REQUEST_TIMEOUT = int(os.getenv("ZOHO_REQUEST_TIMEOUT", 30))
     RATE_LIMIT_DELAY = float(os.getenv("ZOHO_RATE_LIMIT_DELAY", 0.5))
+    # Adaptive limiter: starts at 1 / RATE_LIMIT_DELAY req/s and grows towards
+    # MAX_REQUESTS_PER_SECOND until Zoho answers 429. 0 credit budget = unlimited.
+    MAX_REQUESTS_PER_SECOND = float(os.getenv("ZOHO_MAX_REQUESTS_PER_SECOND", 5))
+    RATE_LIMIT_BURST = int(os.getenv("ZOHO_RATE_LIMIT_BURST", 1))
+    API_CREDIT_BUDGET = int(os.getenv("ZOHO_API_CREDIT_BUDGET", 0))
+    # Records reachable with ?page=N; deeper pages follow the next_page_token cursor
+    PAGE_OFFSET_LIMIT = int(os.getenv("ZOHO_PAGE_OFFSET_LIMIT", 2000))
+    # Paginated fetches flush their cursor and fetched pages to CHECKPOINT_DIR every
+    # CHECKPOINT_PAGES pages, so a failed or killed run resumes mid-module
+    CHECKPOINT_ENABLED = os.getenv("ZOHO_CHECKPOINTS", "1").lower() in ("1", "true", "yes")
+    CHECKPOINT_DIR = os.getenv("ZOHO_CHECKPOINT_DIR", "checkpoints")
+    CHECKPOINT_PAGES = int(os.getenv("ZOHO_CHECKPOINT_PAGES", 10))
+    # Max in-flight requests; values above 1 enable concurrent module/page fetching
+    FETCH_CONCURRENCY = int(os.getenv("ZOHO_FETCH_CONCURRENCY", 1))
+
+    # Bulk Read API: modules with at least this many records are exported as a
+    # zipped CSV instead of paged (0 = always page)
+    BULK_READ_THRESHOLD = int(os.getenv("ZOHO_BULK_READ_THRESHOLD", 10000))
+    BULK_READ_POLL_INTERVAL = float(os.getenv("ZOHO_BULK_READ_POLL_INTERVAL", 5))
+    BULK_READ_TIMEOUT = float(os.getenv("ZOHO_BULK_READ_TIMEOUT", 1800))
+    BULK_READ_CSV_CHUNK_ROWS = int(os.getenv("ZOHO_BULK_READ_CSV_CHUNK_ROWS", 50000))
+
+    # Spill buffered page frames to disk once this many rows are held (0 = never)
+    SPILL_ROWS = int(os.getenv("ZOHO_SPILL_ROWS", 0))
+    SPILL_DIR = os.getenv("ZOHO_SPILL_DIR") or None
+
+    # --pipeline: page flattening runs in this many worker processes (0 = in-thread),
+    # and at most PIPELINE_QUEUE_SIZE finished modules wait for the export sink.
+    PIPELINE_FLATTEN_WORKERS = int(os.getenv("ZOHO_PIPELINE_FLATTEN_WORKERS", min(4, os.cpu_count() or 1)))
+    PIPELINE_QUEUE_SIZE = int(os.getenv("ZOHO_PIPELINE_QUEUE_SIZE", 2))
+
+    # Store low-cardinality text as categoricals, numeric fields as nullable
+    # Int64/Float64 and other text as Arrow strings
+    COMPACT_DTYPES = os.getenv("ZOHO_COMPACT_DTYPES", "0").lower() in ("1", "true", "yes")
+
+    # Incremental sync: fetch only records modified since the last run and merge
+    # them into the local snapshot kept under SNAPSHOT_DIR
+    INCREMENTAL_SYNC = os.getenv("ZOHO_INCREMENTAL_SYNC", "0").lower() in ("1", "true", "yes")
+    SNAPSHOT_DIR = os.getenv("ZOHO_SNAPSHOT_DIR", "snapshots")
+
+    # Columnar record cache written after cleaning; used by `main.py --from-cache`
+    RECORD_CACHE_ENABLED = os.getenv("ZOHO_RECORD_CACHE", "1").lower() in ("1", "true", "yes")
+    RECORD_CACHE_DIR = os.getenv("ZOHO_RECORD_CACHE_DIR", "cache")
+    RECORD_CACHE_TTL_HOURS = float(os.getenv("ZOHO_RECORD_CACHE_TTL_HOURS", 24))
+
+    # settings/fields metadata cache; revalidated with ETag once older than the TTL
+    FIELD_CACHE_DIR = os.getenv("ZOHO_FIELD_CACHE_DIR", os.path.join("cache", "fields"))
+    FIELD_CACHE_TTL_HOURS = float(os.getenv("ZOHO_FIELD_CACHE_TTL_HOURS", 168))
+    FIELD_CACHE_IN_DB = os.getenv("ZOHO_FIELD_CACHE_IN_DB", "0").lower() in ("1", "true", "yes")
+
+    # --batch: tenants (service rows in zoho_tokens) reported concurrently
+    BATCH_WORKERS = int(os.getenv("ZOHO_BATCH_WORKERS", 4))
+
+    # Non-Excel exports (--formats parquet,csv.gz,sql). EXPORT_SQL_URL overrides the
+    # SQL Server target with any SQLAlchemy URL, e.g. sqlite:///zoho_export.db
+    EXPORT_DIR = os.getenv("ZOHO_EXPORT_DIR", "exports")
+    EXPORT_SQL_URL = os.getenv("ZOHO_EXPORT_SQL_URL", "")
+    EXPORT_SQL_CHUNK_ROWS = int(os.getenv("ZOHO_EXPORT_SQL_CHUNK_ROWS", 5000))
+
+    # Daily aggregate store (zoho_daily_aggregates): per-day, per-dimension rollups
+    # refreshed after each run; `main.py --from-aggregates --start/--end` reports any
+    # date range from it. AGGREGATES_SQL_URL overrides SQL Server (e.g. sqlite:///agg.db)
+    AGGREGATES_ENABLED = os.getenv("ZOHO_AGGREGATES", "0").lower() in ("1", "true", "yes")
+    AGGREGATES_SQL_URL = os.getenv("ZOHO_AGGREGATES_SQL_URL", "")
+
+    # service.py: report jobs as "<cron>|<main.py flags>" separated by ";", e.g.
+    # "0 7 * * *|--pipeline --formats xlsx,parquet;30 * * * *|--from-cache --formats parquet".
+    # Triggers are accepted on SERVICE_HOST:SERVICE_PORT (loopback only) and must carry
+    # SERVICE_SECRET; without one, the service writes a random secret to SERVICE_SECRET_FILE.
+    SERVICE_JOBS = os.getenv("ZOHO_SERVICE_JOBS", "")
+    SERVICE_HOST = os.getenv("ZOHO_SERVICE_HOST", "127.0.0.1")
+    SERVICE_PORT = int(os.getenv("ZOHO_SERVICE_PORT", 8765))
+    SERVICE_SECRET = os.getenv("ZOHO_SERVICE_SECRET", "")
+    SERVICE_SECRET_FILE = os.getenv("ZOHO_SERVICE_SECRET_FILE", ".service_secret")
 
     # Database (SQL Server) ODBC string - set as env var for production
     SQL_ODBC = os.getenv("SQL_SERVER_ODBC", "")
+
+    def __init__(self, now: datetime = None):
+        # Date range (default: current month), fixed when the Config is created so a
+        # long-running service gets a fresh window for every job
+        self.MONTH_START, self.MONTH_END = self.month_window(now)
+
+    @staticmethod
+    def month_window(now: datetime = None):
+        now = now or datetime.now()
+        return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0), now
@@ -1,6 +1,30 @@
 # data_processor.py
+import numpy as np
 import pandas as pd
 import json
+import os
+import re
+import tempfile
+from itertools import chain
+from typing import Callable, Iterable, List, Optional
+import instrumentation
+
+_MISSING = object()
+_NUMERIC_TYPES = {"integer", "bigint", "double", "currency", "decimal", "percent", "long"}
+_INTEGER_TYPES = {"integer", "bigint", "long"}
+try:
+    import pyarrow  # noqa: F401
+    _ARROW_STRING = pd.StringDtype("pyarrow")
+except ImportError:  # pragma: no cover - optional dependency
+    _ARROW_STRING = None
+_UTC_OFFSET = re.compile(r"([+-])(\d{2}):?(\d{2})")
+_ISO_DATETIME = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?")
+_NAN = float("nan")
+
+
+class _KeyCollision(Exception):
+    pass
+
 
 class DataProcessor:
     @staticmethod
@@ -19,11 +43,159 @@ class DataProcessor:
                 items.append((new_key, v))
         return dict(items)
 
+    @staticmethod
+    def _flatten_list(v: list):
+        if v and isinstance(v[0], dict):
+            return json.dumps(v, ensure_ascii=False)
+        return ", ".join(str(x) for x in v) if v else ""
+
+    @staticmethod
+    def _flatten_columns(idx: List[int], dicts: List[dict], n: int, prefix: str, sep: str,
+                         columns: dict, first_seen: dict):
+        full = len(idx) == n
+        for k in dict.fromkeys(chain.from_iterable(dicts)):
+            name = f"{prefix}{sep}{k}" if prefix else k
+            vals = [d.get(k, _MISSING) for d in dicts]
+            kinds = set(map(type, vals))
+            if dict not in kinds and list not in kinds:
+                if name in columns:
+                    raise _KeyCollision(name)
+                if full and object not in kinds:
+                    columns[name] = vals
+                    first_seen[name] = 0
+                    continue
+                col = [_NAN] * n
+                for i, v in zip(idx, vals):
+                    if v is not _MISSING:
+                        if name not in first_seen:
+                            first_seen[name] = i
+                        col[i] = v
+                columns[name] = col
+                continue
+
+            # Mixed or nested column: scalars and lists land in this column,
+            # dicts are flattened one level down with the same column-wise pass.
+            col, sub_idx, sub_dicts = None, [], []
+            for i, v in zip(idx, vals):
+                if v is _MISSING:
+                    continue
+                if isinstance(v, dict):
+                    sub_idx.append(i)
+                    sub_dicts.append(v)
+                    continue
+                if col is None:
+                    if name in columns:
+                        raise _KeyCollision(name)
+                    col = columns[name] = [_NAN] * n
+                    first_seen[name] = i
+                col[i] = DataProcessor._flatten_list(v) if isinstance(v, list) else v
+            if sub_dicts:
+                DataProcessor._flatten_columns(sub_idx, sub_dicts, n, name, sep, columns, first_seen)
+
+    @staticmethod
+    @instrumentation.timed("transform.flatten")
+    def flatten_records(records: List[dict], sep: str = "_") -> pd.DataFrame:
+        """
+        Column-wise equivalent of pd.DataFrame([flatten_dict(r) for r in records]).
+        The flattened schema is worked out once for the whole page by walking each key
+        across all records at once instead of recursing per record.
+        """
+        n = len(records)
+        if n == 0:
+            return pd.DataFrame()
+        columns, first_seen = {}, {}
+        try:
+            DataProcessor._flatten_columns(list(range(n)), records, n, "", sep, columns, first_seen)
+        except _KeyCollision:
+            # Two key paths flatten to the same name; defer to flatten_dict's last-wins rule.
+            return pd.DataFrame([DataProcessor.flatten_dict(r, sep=sep) for r in records])
+
+        # Match pandas' list-of-dicts column order: keys in order of first appearance,
+        # taken from the flattened key order of each record that introduces a column.
+        order = {}
+        for i in sorted(set(first_seen.values())):
+            for key in DataProcessor.flatten_dict(records[i], sep=sep):
+                order.setdefault(key, None)
+        if not order:
+            return pd.DataFrame(index=pd.RangeIndex(n), columns=pd.Index([], dtype=object))
+        return pd.DataFrame({key: columns[key] for key in order})
+
+    @staticmethod
+    def page_to_frame(records: List[dict]) -> pd.DataFrame:
+        return DataProcessor.clean_column_names(DataProcessor.flatten_records(records))
+
+    @staticmethod
+    @instrumentation.timed("transform.frame_from_pages")
+    def frame_from_pages(pages: Iterable[List[dict]], spill_rows: Optional[int] = None,
+                         spill_dir: Optional[str] = None,
+                         flatten: Optional[Callable[[Iterable[List[dict]]], Iterable[pd.DataFrame]]] = None
+                         ) -> pd.DataFrame:
+        """
+        Builds the cleaned (not yet datetime-normalised) module frame from an iterator of record pages. Each page is
+        flattened into its own typed frame as it arrives and the chunks are concatenated
+        once, so raw JSON never accumulates for the whole module. With spill_rows set,
+        buffered chunks are pickled to spill_dir whenever that many rows are held.
+        flatten maps the page iterator to page frames in order (e.g. across a process
+        pool); by default each page goes through page_to_frame inline.
+        """
+        chunks, spilled, buffered = [], [], 0
+        spill_to = None
+        try:
+            pages = (records for records in pages if records)
+            for chunk in flatten(pages) if flatten else map(DataProcessor.page_to_frame, pages):
+                chunks.append(chunk)
+                buffered += len(chunk)
+                if spill_rows and buffered >= spill_rows:
+                    if spill_to is None:
+                        spill_to = tempfile.mkdtemp(prefix="zoho_spill_", dir=spill_dir)
+                    path = os.path.join(spill_to, f"{len(spilled)}.pkl")
+                    pd.concat(chunks, ignore_index=True, sort=False).to_pickle(path)
+                    spilled.append(path)
+                    chunks, buffered = [], 0
+
+            parts = [pd.read_pickle(p) for p in spilled] + chunks
+            if not parts:
+                return pd.DataFrame()
+            df = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True, sort=False)
+        finally:
+            for p in spilled:
+                os.remove(p)
+            if spill_to:
+                os.rmdir(spill_to)
+
+        # Per-page inference can leave object columns (e.g. all-None in one page,
+        # floats in another) that a single whole-module frame would have typed.
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].infer_objects()
+        return df
+
+    @staticmethod
+    def _clean_name(name: str) -> str:
+        for old, new in (('$', ''), ('.', '_'), (' ', '_'), ('(', ''), (')', '')):
+            name = name.replace(old, new)
+        return name
+
+    @staticmethod
+    def column_types(fields: List[dict], sep: str = "_") -> dict:
+        """
+        Maps flattened, cleaned column names to Bigin data types from cached field
+        metadata. Lookups flatten to `<field>_id` and `<field>_name`, both text.
+        """
+        types = {}
+        for f in fields:
+            name = DataProcessor._clean_name(f["api_name"])
+            if f.get("data_type") in ("lookup", "ownerlookup"):
+                types[f"{name}{sep}id"] = "text"
+                types[f"{name}{sep}name"] = "text"
+            else:
+                types[name] = f.get("data_type")
+        return types
+
     @staticmethod
     def clean_column_names(df: pd.DataFrame) -> pd.DataFrame:
         if df.empty:
             return df
-        df = df.copy()
+        df = df.copy(deep=False)
         df.columns = (df.columns
                       .str.replace('$', '', regex=False)
                       .str.replace('.', '_', regex=False)
@@ -33,24 +205,107 @@ class DataProcessor:
         return df
 
     @staticmethod
-    def remove_all_timezones(df: pd.DataFrame) -> pd.DataFrame:
+    def _is_text(series: pd.Series) -> bool:
+        return series.dtype == object or isinstance(series.dtype, pd.StringDtype)
+
+    @staticmethod
+    def _offset_seconds(text: str) -> Optional[int]:
+        if text in ("", "Z"):
+            return 0
+        m = _UTC_OFFSET.fullmatch(text)
+        if not m:
+            return None
+        seconds = int(m.group(2)) * 3600 + int(m.group(3)) * 60
+        return -seconds if m.group(1) == "-" else seconds
+
+    @staticmethod
+    def _to_naive_utc(series: pd.Series) -> pd.Series:
+        # Fast path for Zoho's fixed "YYYY-MM-DDTHH:MM:SS+HH:MM" layout: parse the
+        # wall time with a fixed format and apply each distinct offset once.
+        try:
+            local = pd.to_datetime(series.str.slice(0, 19), format="%Y-%m-%dT%H:%M:%S", errors="raise")
+            codes, offsets = pd.factorize(series.str.slice(19))
+            seconds = [DataProcessor._offset_seconds(o) for o in offsets]
+            if None not in seconds:
+                shift = np.append(np.array(seconds, dtype="int64"), 0)[codes]
+                return local - pd.to_timedelta(shift, unit="s")
+        except (AttributeError, TypeError, ValueError):
+            pass
+        try:
+            parsed = pd.to_datetime(series, errors="coerce", utc=True, format="ISO8601")
+        except (TypeError, ValueError):
+            parsed = pd.to_datetime(series, errors="coerce", utc=True)
+        return parsed.dt.tz_localize(None)
+
+    @staticmethod
+    def _looks_iso_datetime(series: pd.Series) -> bool:
+        values = series.dropna()
+        if values.empty or not isinstance(values.iloc[0], str) or not _ISO_DATETIME.match(values.iloc[0]):
+            return False
+        # Every value must be an ISO-8601 timestamp, not just the first one.
+        return bool(values.astype(str).str.fullmatch(_ISO_DATETIME.pattern).all())
+
+    @staticmethod
+    @instrumentation.timed("transform.normalize_datetimes")
+    def normalize_datetimes(df: pd.DataFrame, field_types: Optional[dict] = None) -> pd.DataFrame:
+        """
+        Converts datetime columns to naive UTC in one pass and marks the frame with
+        attrs["datetimes_normalized"] so later stages skip it. Columns typed
+        "datetime" in the field metadata are converted directly; columns typed as
+        anything else are left alone; untyped text columns are converted only if
+        every value is an ISO-8601 timestamp. Timezone-aware columns are made naive.
+        """
+        if df.empty or df.attrs.get("datetimes_normalized"):
+            return df
+        field_types = field_types if field_types is not None else df.attrs.get("field_types") or {}
+        df = df.copy(deep=False)
+        for col in df.columns:
+            series = df[col]
+            if isinstance(series.dtype, pd.DatetimeTZDtype):
+                df[col] = series.dt.tz_localize(None)
+                continue
+            if not DataProcessor._is_text(series):
+                continue
+            data_type = field_types.get(col)
+            if data_type == "datetime" or (data_type is None and DataProcessor._looks_iso_datetime(series)):
+                df[col] = DataProcessor._to_naive_utc(series)
+        df.attrs["datetimes_normalized"] = True
+        return df
+
+    @staticmethod
+    def memory_mb(df: pd.DataFrame) -> float:
+        return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+    @staticmethod
+    @instrumentation.timed("transform.compact_dtypes")
+    def compact_dtypes(df: pd.DataFrame, field_types: Optional[dict] = None,
+                       max_category_ratio: float = 0.5) -> pd.DataFrame:
+        """
+        Shrinks a module frame: numeric fields (per field metadata) become nullable
+        Int64/Float64, all-text columns with few distinct values become categorical,
+        and remaining all-text columns become Arrow-backed strings when pyarrow is
+        installed. Mixed-type, boolean and datetime columns are left as they are.
+        """
         if df.empty:
             return df
-        df = df.copy()
+        field_types = field_types if field_types is not None else df.attrs.get("field_types") or {}
+        df = df.copy(deep=False)
         for col in df.columns:
-            if df[col].dtype == 'object':
-                sample = df[col].dropna().head(1)
-                if not sample.empty:
-                    sample_val = str(sample.iloc[0])
-                    if any(x in sample_val for x in ['T', 'Z', '+', '-']) and ':' in sample_val:
-                        try:
-                            df[col] = pd.to_datetime(df[col], errors='coerce', utc=True).dt.tz_localize(None)
-                        except:
-                            pass
-            elif 'datetime' in str(df[col].dtype):
-                try:
-                    if hasattr(df[col].dtype, 'tz') and df[col].dtype.tz is not None:
-                        df[col] = df[col].dt.tz_localize(None)
-                except:
-                    pass
+            series = df[col]
+            data_type = field_types.get(col)
+            if data_type in _NUMERIC_TYPES and (DataProcessor._is_text(series) or series.dtype.kind in "if"):
+                numeric = pd.to_numeric(series, errors="coerce")
+                df[col] = numeric.astype("Int64" if data_type in _INTEGER_TYPES else "Float64")
+                continue
+            if not DataProcessor._is_text(series) or pd.api.types.infer_dtype(series, skipna=True) != "string":
+                continue
+            non_null = series.count()
+            if non_null and series.nunique() <= max_category_ratio * non_null:
+                df[col] = series.astype("category")
+            elif _ARROW_STRING is not None and getattr(series.dtype, "storage", None) != "pyarrow":
+                df[col] = series.astype(_ARROW_STRING)
         return df
+
+    @staticmethod
+    def remove_all_timezones(df: pd.DataFrame) -> pd.DataFrame:
+        return DataProcessor.normalize_datetimes(df)
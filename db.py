@@ -4,12 +4,27 @@ from urllib.parse import quote_plus
 from datetime import datetime
 
 class DB:
-    """Simple DB wrapper for token CRUD using SQLAlchemy"""
-    def __init__(self, odbc_connection_string: str):
+    """Simple DB wrapper for token, sync-state and field-metadata CRUD using SQLAlchemy"""
+    def __init__(self, odbc_connection_string: str, pool_size: int = None):
         if not odbc_connection_string:
             raise ValueError("ODBC connection string is required. Set SQL_SERVER_ODBC env var.")
         quoted = quote_plus(odbc_connection_string)
-        self.engine = create_engine(f"mssql+pyodbc:///?odbc_connect={quoted}", fast_executemany=True)
+        # Batch runs share one engine across tenants, so size its pool to the worker count.
+        pool = {"pool_size": pool_size, "max_overflow": pool_size} if pool_size else {}
+        self.engine = create_engine(f"mssql+pyodbc:///?odbc_connect={quoted}", fast_executemany=True, **pool)
+
+    @classmethod
+    def from_url(cls, url: str) -> "DB":
+        """Wraps any SQLAlchemy URL (e.g. sqlite:///local.db as a local stand-in for SQL Server)."""
+        db = cls.__new__(cls)
+        db.engine = create_engine(url, fast_executemany=True) if url.startswith("mssql") else create_engine(url)
+        return db
+
+    def list_services(self) -> list:
+        """Every service in zoho_tokens that has a refresh token, i.e. every org a batch run can report on."""
+        sql = text("SELECT service FROM zoho_tokens WHERE refresh_token IS NOT NULL ORDER BY service")
+        with self.engine.connect() as conn:
+            return [r[0] for r in conn.execute(sql).fetchall()]
 
     def get_token_row(self, service: str):
         sql = text("SELECT service, access_token, refresh_token, expires_at FROM zoho_tokens WHERE service = :svc")
@@ -39,3 +54,60 @@ class DB:
                             VALUES(:svc, :access_token, :refresh_token, :expires_at)"""),
                     {"svc": service, "access_token": access_token, "refresh_token": refresh_token, "expires_at": expires_at}
                 )
+
+    def get_sync_state(self, service: str, module: str):
+        sql = text("""SELECT max_modified_time, last_sync_at FROM zoho_sync_state
+                      WHERE service = :svc AND module = :module""")
+        with self.engine.connect() as conn:
+            r = conn.execute(sql, {"svc": service, "module": module}).fetchone()
+            if not r:
+                return None
+            return {"max_modified_time": r[0], "last_sync_at": r[1]}
+
+    def upsert_sync_state(self, service: str, module: str, max_modified_time=None, last_sync_at=None):
+        params = {"svc": service, "module": module, "max_modified_time": max_modified_time, "last_sync_at": last_sync_at}
+        with self.engine.begin() as conn:
+            existing = conn.execute(text("SELECT 1 FROM zoho_sync_state WHERE service = :svc AND module = :module"),
+                                    {"svc": service, "module": module}).scalar()
+            if existing:
+                conn.execute(
+                    text("""UPDATE zoho_sync_state
+                            SET max_modified_time = :max_modified_time,
+                                last_sync_at = :last_sync_at
+                            WHERE service = :svc AND module = :module"""),
+                    params
+                )
+            else:
+                conn.execute(
+                    text("""INSERT INTO zoho_sync_state(service, module, max_modified_time, last_sync_at)
+                            VALUES(:svc, :module, :max_modified_time, :last_sync_at)"""),
+                    params
+                )
+
+    def get_field_metadata(self, service: str, module: str):
+        sql = text("""SELECT fields_json, etag, fetched_at FROM zoho_field_metadata
+                      WHERE service = :svc AND module = :module""")
+        with self.engine.connect() as conn:
+            r = conn.execute(sql, {"svc": service, "module": module}).fetchone()
+            if not r:
+                return None
+            return {"fields_json": r[0], "etag": r[1], "fetched_at": float(r[2])}
+
+    def upsert_field_metadata(self, service: str, module: str, fields_json: str, etag: str = None, fetched_at: float = None):
+        params = {"svc": service, "module": module, "fields_json": fields_json, "etag": etag, "fetched_at": fetched_at}
+        with self.engine.begin() as conn:
+            existing = conn.execute(text("SELECT 1 FROM zoho_field_metadata WHERE service = :svc AND module = :module"),
+                                    {"svc": service, "module": module}).scalar()
+            if existing:
+                conn.execute(
+                    text("""UPDATE zoho_field_metadata
+                            SET fields_json = :fields_json, etag = :etag, fetched_at = :fetched_at
+                            WHERE service = :svc AND module = :module"""),
+                    params
+                )
+            else:
+                conn.execute(
+                    text("""INSERT INTO zoho_field_metadata(service, module, fields_json, etag, fetched_at)
+                            VALUES(:svc, :module, :fields_json, :etag, :fetched_at)"""),
+                    params
+                )
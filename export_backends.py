@@ -0,0 +1,309 @@
+# export_backends.py
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+import pandas as pd
+from config import EXPORT_FORMATS
+from exporter import MetricsExporter, StreamingWorkbook
+import instrumentation
+
+
+def metrics_to_frame(metrics: dict, run_at: datetime) -> pd.DataFrame:
+    """
+    Long-form view of the metrics dict: one row per (section, metric) with text and
+    numeric value. The grouped tables are exported on their own, not flattened here.
+    """
+    rows = []
+
+    def add(section, metric, value):
+        numeric = float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+        rows.append({"run_at": run_at, "section": section, "metric": metric,
+                     "value": None if value is None else str(value), "numeric_value": numeric})
+
+    def walk(section, prefix, value):
+        if isinstance(value, pd.DataFrame):
+            if value.empty:
+                return
+            key_col = value.columns[0]
+            for rec in value.to_dict("records"):
+                for col, v in rec.items():
+                    if col != key_col:
+                        add(section, f"{prefix}{rec[key_col]}.{col}", v.item() if hasattr(v, "item") else v)
+        elif isinstance(value, dict):
+            for k, v in value.items():
+                walk(section, f"{prefix}{k}.", v)
+        else:
+            add(section, prefix.rstrip("."), value.item() if hasattr(value, "item") else value)
+
+    for section, value in metrics.items():
+        if section != "grouped":
+            walk(section, "", value)
+    return pd.DataFrame(rows, columns=["run_at", "section", "metric", "value", "numeric_value"])
+
+
+class ExportBackend:
+    """
+    One output format. Backends are fed module by module (begin → add_module → finish)
+    so the report pipeline can export each module as soon as it is ready; export()
+    runs the same stages over an already-built data store.
+    """
+    name = ""
+
+    def begin(self, run_at: datetime):
+        self.run_at = run_at
+        self.ok = True
+
+    def add_module(self, name: str, df: pd.DataFrame):
+        raise NotImplementedError
+
+    def finish(self, metrics: Optional[dict]) -> bool:
+        """Writes the metrics and completes the output; metrics=None (metrics failed) completes it as failed."""
+        raise NotImplementedError
+
+    def export(self, data_store: Dict[str, pd.DataFrame], metrics: dict, run_at: datetime) -> bool:
+        self.begin(run_at)
+        for name, df in data_store.items():
+            if df is not None and not df.empty:
+                self.add_module(name, df)
+        return self.finish(metrics)
+
+
+class ExcelBackend(ExportBackend):
+    name = "xlsx"
+
+    def __init__(self, directory: str = ".", streaming: bool = False, prefix: str = "Zoho_Analytics"):
+        self.directory = directory
+        self.streaming = streaming
+        self.prefix = prefix
+
+    def begin(self, run_at):
+        super().begin(run_at)
+        self.filename = os.path.join(self.directory, f"{self.prefix}_{run_at.strftime('%Y%m%d_%H%M%S')}.xlsx")
+        self._modules = {}
+        self._book = None
+        if self.streaming:
+            print(f"\nCreating Excel: {self.filename}")
+            self._book = StreamingWorkbook(self.filename)
+
+    def add_module(self, name, df):
+        if self._book is None:
+            self._modules[name] = df
+            return
+        try:
+            self._book.add_module(name, df)
+        except Exception as e:
+            print(f"    ⚠ xlsx: {name} sheet failed: {e}")
+            self.ok = False
+
+    def finish(self, metrics):
+        if metrics is None:
+            self.ok = False
+            if self._book is not None:
+                try:
+                    self._book.close()  # keep the module sheets already streamed
+                except Exception as e:
+                    print(f"Excel creation failed: {e}")
+        elif self._book is None:
+            self.ok = MetricsExporter.create_excel(self._modules, metrics, self.filename)
+        else:
+            try:
+                self._book.write_dashboard(metrics)
+                self._book.close()
+                print("Excel created.")
+            except Exception as e:
+                print(f"Excel creation failed: {e}")
+                self.ok = False
+        print(f"Report created: {self.filename}" if self.ok else "Failed to create report.")
+        return self.ok
+
+
+class _FileBackend(ExportBackend):
+    extension = ""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _write(self, df: pd.DataFrame, path: str):
+        raise NotImplementedError
+
+    def begin(self, run_at):
+        super().begin(run_at)
+        self.out_dir = os.path.join(self.directory, run_at.strftime("%Y%m%d_%H%M%S"))
+        os.makedirs(self.out_dir, exist_ok=True)
+
+    def add_module(self, name, df):
+        try:
+            self._write(df, os.path.join(self.out_dir, f"{name}.{self.extension}"))
+            print(f"  ✓ {name}.{self.extension}: {len(df)} rows")
+        except Exception as e:
+            print(f"    ⚠ {self.name}: {name} failed: {e}")
+            self.ok = False
+
+    def finish(self, metrics):
+        if metrics is None:
+            self.ok = False
+        else:
+            try:
+                self._write(metrics_to_frame(metrics, self.run_at),
+                            os.path.join(self.out_dir, f"metrics.{self.extension}"))
+                for key, df in (metrics.get("grouped") or {}).items():
+                    self._write(df, os.path.join(self.out_dir, f"grouped_{key}.{self.extension}"))
+            except Exception as e:
+                print(f"    ⚠ {self.name}: metrics failed: {e}")
+                self.ok = False
+        print(f"{self.name} export created: {self.out_dir}" if self.ok else f"{self.name} export failed.")
+        return self.ok
+
+
+class ParquetBackend(_FileBackend):
+    name = "parquet"
+    extension = "parquet"
+
+    def _write(self, df, path):
+        df.to_parquet(path, index=False)
+
+
+class CsvGzBackend(_FileBackend):
+    name = "csv.gz"
+    extension = "csv.gz"
+
+    def _write(self, df, path):
+        df.to_csv(path, index=False, compression="gzip")
+
+
+class SqlBackend(ExportBackend):
+    """
+    Bulk-loads each module into a staging table with chunked executemany inserts
+    (fast_executemany on SQL Server), then upserts into zoho_<module> keyed on id.
+    Metrics are appended to zoho_metrics. SQL Server uses MERGE; SQLite, the local
+    stand-in, uses INSERT ... ON CONFLICT.
+    """
+    name = "sql"
+
+    def __init__(self, db, chunk_rows: int = 5000, table_prefix: str = "zoho_"):
+        self.engine = db.engine
+        self.chunk_rows = chunk_rows
+        self.table_prefix = table_prefix
+
+    def _q(self, name: str) -> str:
+        return self.engine.dialect.identifier_preparer.quote(name)
+
+    @staticmethod
+    def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy(deep=False)
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype) or df[col].dtype == object:
+                df[col] = df[col].astype(object).where(df[col].notna(), None)
+        return df
+
+    def _ensure_target(self, conn, staging: str, target: str, columns: List[str]):
+        # Imported here so file-only exports never load SQLAlchemy.
+        from sqlalchemy import inspect, text
+        insp = inspect(conn)
+        if not insp.has_table(target):
+            if self.engine.dialect.name == "mssql":
+                conn.execute(text(f"SELECT TOP 0 * INTO {self._q(target)} FROM {self._q(staging)}"))
+            else:
+                conn.execute(text(f"CREATE TABLE {self._q(target)} AS SELECT * FROM {self._q(staging)} WHERE 0 = 1"))
+        else:
+            existing = {c["name"] for c in insp.get_columns(target)}
+            col_type = "NVARCHAR(MAX)" if self.engine.dialect.name == "mssql" else "TEXT"
+            for col in columns:
+                if col not in existing:
+                    conn.execute(text(f"ALTER TABLE {self._q(target)} ADD {self._q(col)} {col_type}"))
+        if self.engine.dialect.name != "mssql":
+            conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {self._q('ux_' + target + '_id')} "
+                              f"ON {self._q(target)} ({self._q('id')})"))
+
+    def _merge(self, conn, staging: str, target: str, columns: List[str]):
+        from sqlalchemy import text
+        cols = ", ".join(self._q(c) for c in columns)
+        updates = [c for c in columns if c != "id"]
+        if self.engine.dialect.name == "mssql":
+            set_clause = ", ".join(f"t.{self._q(c)} = s.{self._q(c)}" for c in updates)
+            values = ", ".join(f"s.{self._q(c)}" for c in columns)
+            matched = f"WHEN MATCHED THEN UPDATE SET {set_clause} " if updates else ""
+            conn.execute(text(
+                f"MERGE {self._q(target)} AS t USING {self._q(staging)} AS s ON t.{self._q('id')} = s.{self._q('id')} "
+                f"{matched}WHEN NOT MATCHED THEN INSERT ({cols}) VALUES ({values});"))
+        else:
+            set_clause = ", ".join(f"{self._q(c)} = excluded.{self._q(c)}" for c in updates)
+            action = f"DO UPDATE SET {set_clause}" if updates else "DO NOTHING"
+            conn.execute(text(
+                f"INSERT INTO {self._q(target)} ({cols}) SELECT {cols} FROM {self._q(staging)} WHERE true "
+                f"ON CONFLICT({self._q('id')}) {action}"))
+
+    def load_module(self, name: str, df: pd.DataFrame):
+        from sqlalchemy import text
+        if "id" not in df.columns:
+            raise ValueError(f"{name} has no id column to merge on")
+        target = f"{self.table_prefix}{name.lower()}"
+        staging = f"stg_{target}"
+        df = self._prepare(df.drop_duplicates(subset="id", keep="last"))
+        with self.engine.begin() as conn:
+            df.to_sql(staging, conn, if_exists="replace", index=False, chunksize=self.chunk_rows)
+            self._ensure_target(conn, staging, target, list(df.columns))
+            self._merge(conn, staging, target, list(df.columns))
+            conn.execute(text(f"DROP TABLE {self._q(staging)}"))
+
+    def add_module(self, name, df):
+        try:
+            self.load_module(name, df)
+            print(f"  ✓ {self.table_prefix}{name.lower()}: {len(df)} rows merged")
+        except Exception as e:
+            print(f"    ⚠ sql: {name} failed: {e}")
+            self.ok = False
+
+    def finish(self, metrics):
+        if metrics is None:
+            self.ok = False
+            print("SQL export failed.")
+            return self.ok
+        try:
+            with self.engine.begin() as conn:
+                metrics_to_frame(metrics, self.run_at).to_sql(f"{self.table_prefix}metrics", conn,
+                                                              if_exists="append", index=False,
+                                                              chunksize=self.chunk_rows)
+        except Exception as e:
+            print(f"    ⚠ sql: metrics failed: {e}")
+            self.ok = False
+        print("SQL export complete." if self.ok else "SQL export failed.")
+        return self.ok
+
+
+def build_backends(formats: List[str], cfg, streaming_excel: bool = False, db=None,
+                   tenant: Optional[str] = None) -> List[ExportBackend]:
+    """
+    One backend per format. With a tenant (batch runs), output names are kept apart
+    per tenant: Zoho_Analytics_<tenant>_<ts>.xlsx, <EXPORT_DIR>/<tenant>/ and
+    zoho_<tenant>_<module> tables.
+    """
+    backends = []
+    export_dir = os.path.join(cfg.EXPORT_DIR, tenant) if tenant else cfg.EXPORT_DIR
+    for fmt in formats:
+        if fmt == "xlsx":
+            prefix = f"Zoho_Analytics_{tenant}" if tenant else "Zoho_Analytics"
+            backends.append(ExcelBackend(".", streaming=streaming_excel, prefix=prefix))
+        elif fmt == "parquet":
+            backends.append(ParquetBackend(export_dir))
+        elif fmt == "csv.gz":
+            backends.append(CsvGzBackend(export_dir))
+        elif fmt == "sql":
+            if db is None:
+                from db import DB
+                db = DB.from_url(cfg.EXPORT_SQL_URL) if cfg.EXPORT_SQL_URL else DB(cfg.SQL_ODBC)
+            prefix = f"zoho_{tenant.lower()}_" if tenant else "zoho_"
+            backends.append(SqlBackend(db, chunk_rows=cfg.EXPORT_SQL_CHUNK_ROWS, table_prefix=prefix))
+        else:
+            raise ValueError(f"Unknown export format '{fmt}'. Choose from: {', '.join(EXPORT_FORMATS)}")
+    return backends
+
+
+def run_exports(backends: List[ExportBackend], data_store: dict, metrics: dict, run_at: datetime = None) -> bool:
+    """Runs every backend against the same frames; one failing format doesn't stop the others."""
+    run_at = run_at or datetime.now()
+    results = []
+    for backend in backends:
+        with instrumentation.timer(f"export.{backend.name}"):
+            results.append(backend.export(data_store, metrics, run_at))
+    return all(results)
@@ -1,30 +1,104 @@
 # exporter.py
 import pandas as pd
 from datetime import datetime
+from itertools import chain
+from openpyxl import Workbook
 from data_processor import DataProcessor
 
+try:
+    import xlsxwriter
+except ImportError:  # pragma: no cover - optional dependency
+    xlsxwriter = None
+
+# Excel's hard limit is 1,048,576 rows per sheet, one of which is the header.
+EXCEL_MAX_DATA_ROWS = 1_048_575
+DASHBOARD_COLUMNS = ["Metric", "Value", "Details"]
+DASHBOARD_WIDTHS = {"A": 40, "B": 20, "C": 20}
+# metrics["grouped"] tables and their sheet names, written after the module sheets.
+GROUPED_SHEETS = {"by_owner": "By Owner", "by_account": "By Account", "by_stage": "By Stage",
+                  "by_lead_source": "By Lead Source"}
+
 class MetricsExporter:
     @staticmethod
-    def create_excel(raw_data: dict, metrics: dict, filename: str) -> bool:
+    def create_excel(raw_data: dict, metrics: dict, filename: str, streaming: bool = False,
+                     chunk_rows: int = 10000) -> bool:
+        """
+        Writes the Dashboard sheet, one sheet per module and one per grouped metric
+        table ("By Owner", "By Account", ...). With streaming=True rows
+        are written in chunks straight from the DataFrame through xlsxwriter's
+        constant_memory mode (or openpyxl write-only mode if xlsxwriter is missing),
+        so memory stays flat regardless of sheet size. Either way, modules larger
+        than Excel's row limit are split across "<Module> (2)", "<Module> (3)", ...
+        """
         print(f"\nCreating Excel: {filename}")
         try:
-            with pd.ExcelWriter(filename, engine="openpyxl") as writer:
-                MetricsExporter._create_dashboard(writer, metrics)
-                for name, df in raw_data.items():
-                    if df is None or df.empty:
-                        continue
-                    safe_name = name[:31]
-                    df_clean = DataProcessor.remove_all_timezones(df)
-                    df_clean.to_excel(writer, sheet_name=safe_name, index=False)
-                    print(f"  ✓ {safe_name}: {len(df)} rows")
+            if streaming:
+                MetricsExporter._create_excel_streaming(raw_data, metrics, filename, chunk_rows)
+            else:
+                with pd.ExcelWriter(filename, engine="openpyxl") as writer:
+                    MetricsExporter._create_dashboard(writer, metrics)
+                    for sheet_name, part in chain(MetricsExporter._module_sheets(raw_data),
+                                                  MetricsExporter._module_sheets(MetricsExporter.grouped_tables(metrics))):
+                        part.to_excel(writer, sheet_name=sheet_name, index=False)
+                        print(f"  ✓ {sheet_name}: {len(part)} rows")
             print("Excel created.")
             return True
         except Exception as e:
             print(f"Excel creation failed: {e}")
             return False
 
+    @staticmethod
+    def _sheet_parts(name: str, df: pd.DataFrame):
+        if len(df) <= EXCEL_MAX_DATA_ROWS:
+            yield name[:31], df
+            return
+        for i, start in enumerate(range(0, len(df), EXCEL_MAX_DATA_ROWS)):
+            suffix = f" ({i + 1})" if i else ""
+            yield name[:31 - len(suffix)] + suffix, df.iloc[start:start + EXCEL_MAX_DATA_ROWS]
+
+    @staticmethod
+    def _iter_rows(df: pd.DataFrame, chunk_rows: int):
+        """Yields plain-Python rows chunk by chunk, with NaN/NaT/NA as empty cells."""
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows].astype(object)
+            chunk = chunk.where(chunk.notna(), None)
+            yield from chunk.itertuples(index=False, name=None)
+
+    @staticmethod
+    def _module_sheets(raw_data: dict):
+        for name, df in raw_data.items():
+            if df is None or df.empty:
+                continue
+            yield from MetricsExporter._sheet_parts(name, DataProcessor.remove_all_timezones(df))
+
+    @staticmethod
+    def grouped_tables(metrics: dict) -> dict:
+        """Non-empty grouped metric tables keyed by sheet name."""
+        grouped = metrics.get("grouped") or {}
+        return {title: grouped[key] for key, title in GROUPED_SHEETS.items()
+                if isinstance(grouped.get(key), pd.DataFrame) and not grouped[key].empty}
+
+    @staticmethod
+    def _create_excel_streaming(raw_data: dict, metrics: dict, filename: str, chunk_rows: int):
+        book = StreamingWorkbook(filename, chunk_rows)
+        try:
+            for name, df in raw_data.items():
+                book.add_module(name, df)
+            book.write_dashboard(metrics)
+        finally:
+            book.close()
+
     @staticmethod
     def _create_dashboard(writer, metrics: dict):
+        df = pd.DataFrame(MetricsExporter._dashboard_rows(metrics), columns=DASHBOARD_COLUMNS)
+        df.to_excel(writer, sheet_name="Dashboard", index=False)
+        ws = writer.sheets["Dashboard"]
+        for col, width in DASHBOARD_WIDTHS.items():
+            ws.column_dimensions[col].width = width
+        print("  ✓ Dashboard sheet created")
+
+    @staticmethod
+    def _dashboard_rows(metrics: dict) -> list:
         data = []
         data.append(["ZOHO BIGIN ANALYTICS DASHBOARD", "", ""])
         data.append(["Generated:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"), ""])
@@ -76,10 +150,60 @@ class MetricsExporter:
         data.append(["Total Deals", metrics["deals"]["total_deals"], ""])
         data.append(["Deals Won", metrics["deals"]["deals_won"], ""])
         data.append(["Win Rate", metrics["deals"]["win_rate"], ""])
-        df = pd.DataFrame(data, columns=["Metric", "Value", "Details"])
-        df.to_excel(writer, sheet_name="Dashboard", index=False)
-        ws = writer.sheets["Dashboard"]
-        ws.column_dimensions["A"].width = 40
-        ws.column_dimensions["B"].width = 20
-        ws.column_dimensions["C"].width = 20
+        return data
+
+
+class StreamingWorkbook:
+    """
+    Workbook written incrementally: the Dashboard sheet is reserved first so it stays
+    the first tab, module sheets are streamed as their frames arrive, and the
+    dashboard rows and grouped metric sheets are written last once metrics are
+    known. Uses xlsxwriter's
+    constant_memory mode, or openpyxl write-only mode if xlsxwriter is missing.
+    """
+    def __init__(self, filename: str, chunk_rows: int = 10000):
+        self.filename = filename
+        self.chunk_rows = chunk_rows
+        if xlsxwriter is not None:
+            self._wb = xlsxwriter.Workbook(filename, {"constant_memory": True, "nan_inf_to_errors": True,
+                                                      "default_date_format": "yyyy-mm-dd hh:mm:ss"})
+            self._dashboard = self._wb.add_worksheet("Dashboard")
+            for col, width in DASHBOARD_WIDTHS.items():
+                self._dashboard.set_column(f"{col}:{col}", width)
+        else:
+            self._wb = Workbook(write_only=True)
+            self._dashboard = self._wb.create_sheet("Dashboard")
+            for col, width in DASHBOARD_WIDTHS.items():
+                self._dashboard.column_dimensions[col].width = width
+
+    def _write_rows(self, ws, rows):
+        if xlsxwriter is not None:
+            for r, row in enumerate(rows):
+                ws.write_row(r, 0, row)
+        else:
+            for row in rows:
+                ws.append(row)
+
+    def _add_sheet(self, name: str):
+        return self._wb.add_worksheet(name) if xlsxwriter is not None else self._wb.create_sheet(name)
+
+    def add_module(self, name: str, df: pd.DataFrame):
+        if df is None or df.empty:
+            return
+        for sheet_name, part in MetricsExporter._sheet_parts(name, DataProcessor.remove_all_timezones(df)):
+            header = [[str(c) for c in part.columns]]
+            self._write_rows(self._add_sheet(sheet_name),
+                             chain(header, MetricsExporter._iter_rows(part, self.chunk_rows)))
+            print(f"  ✓ {sheet_name}: {len(part)} rows")
+
+    def write_dashboard(self, metrics: dict):
+        self._write_rows(self._dashboard, [DASHBOARD_COLUMNS] + MetricsExporter._dashboard_rows(metrics))
         print("  ✓ Dashboard sheet created")
+        for name, df in MetricsExporter.grouped_tables(metrics).items():
+            self.add_module(name, df)
+
+    def close(self):
+        if xlsxwriter is not None:
+            self._wb.close()
+        else:
+            self._wb.save(self.filename)
@@ -0,0 +1,84 @@
+# field_cache.py
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+
+def compact_fields(fields: List[Dict]) -> List[Dict]:
+    """Keeps only the parts of settings/fields we use: api_name, data_type and lookup target."""
+    out = []
+    for f in fields:
+        if not f.get("api_name"):
+            continue
+        lookup = f.get("lookup") or {}
+        module = lookup.get("module") or {}
+        out.append({
+            "api_name": f["api_name"],
+            "data_type": f.get("data_type"),
+            "json_type": f.get("json_type"),
+            "lookup_module": module.get("api_name") if isinstance(module, dict) else module,
+        })
+    return out
+
+
+class FieldMetadataCache:
+    """
+    Per-module field definitions cached as local JSON and, optionally, in the
+    zoho_field_metadata table. Entries within the TTL are used as-is; older ones
+    are revalidated with their ETag.
+    """
+    def __init__(self, directory: str, ttl_seconds: float, db=None, service: str = "zoho_bigin"):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.db = db
+        self.service = service
+
+    def _path(self, module: str) -> str:
+        return os.path.join(self.directory, self.service, f"{module}.json")
+
+    def get(self, module: str) -> Optional[Dict]:
+        path = self._path(module)
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        if self.db is not None:
+            try:
+                row = self.db.get_field_metadata(self.service, module)
+            except Exception as e:
+                print(f"    ⚠ Field metadata DB read failed: {e}")
+                row = None
+            if row:
+                entry = {"module": module, "fields": json.loads(row["fields_json"]),
+                         "etag": row["etag"], "fetched_at": row["fetched_at"]}
+                self._write_local(module, entry)
+                return entry
+        return None
+
+    def is_fresh(self, entry: Optional[Dict]) -> bool:
+        return bool(entry) and time.time() - entry.get("fetched_at", 0) < self.ttl_seconds
+
+    def put(self, module: str, fields: List[Dict], etag: Optional[str] = None) -> Dict:
+        entry = {"module": module, "fields": fields, "etag": etag, "fetched_at": time.time()}
+        self._write_local(module, entry)
+        if self.db is not None:
+            try:
+                self.db.upsert_field_metadata(self.service, module, json.dumps(fields), etag, entry["fetched_at"])
+            except Exception as e:
+                print(f"    ⚠ Field metadata DB write failed: {e}")
+        return entry
+
+    def touch(self, entry: Dict) -> Dict:
+        """Marks a revalidated (304) entry as fresh again."""
+        return self.put(entry["module"], entry["fields"], entry.get("etag"))
+
+    def _write_local(self, module: str, entry: Dict):
+        path = self._path(module)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
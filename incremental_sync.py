@@ -0,0 +1,90 @@
+# incremental_sync.py
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class SnapshotStore:
+    """Persists the latest copy of every record per module as JSON, keyed by record id."""
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, service: str, module: str) -> str:
+        return os.path.join(self.directory, service, f"{module}.json")
+
+    def exists(self, service: str, module: str) -> bool:
+        return os.path.exists(self._path(service, module))
+
+    def load(self, service: str, module: str) -> List[Dict]:
+        path = self._path(service, module)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, service: str, module: str, records: List[Dict]):
+        path = self._path(service, module)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def merge(existing: List[Dict], changed: List[Dict]) -> List[Dict]:
+        """Replaces records in place by id and appends new ones, keeping the original order."""
+        merged = list(existing)
+        position = {r.get("id"): i for i, r in enumerate(merged)}
+        for r in changed:
+            i = position.get(r.get("id"))
+            if i is None:
+                position[r.get("id")] = len(merged)
+                merged.append(r)
+            else:
+                merged[i] = r
+        return merged
+
+
+class IncrementalSync:
+    """
+    Tracks a Modified_Time high-water mark per module in zoho_sync_state and
+    merges changed records into the local snapshot.
+    """
+    def __init__(self, db, store: SnapshotStore, service: str = "zoho_bigin"):
+        self.db = db
+        self.store = store
+        self.service = service
+
+    def modified_since(self, module: str) -> Optional[datetime]:
+        # Without a local snapshot there is nothing to merge into, so do a full fetch.
+        if not self.store.exists(self.service, module):
+            return None
+        state = self.db.get_sync_state(self.service, module)
+        return _parse_time(state["max_modified_time"]) if state else None
+
+    def apply(self, module: str, changed: List[Dict], started_at: datetime, full: bool = False) -> List[Dict]:
+        """
+        Merges the fetched records into the snapshot and advances the watermark to
+        their max Modified_Time. Only for complete fetches: a watermark past records
+        never fetched would hide them from every later sync.
+        """
+        records = changed if full else self.store.merge(self.store.load(self.service, module), changed)
+        self.store.save(self.service, module, records)
+
+        watermark = max((t for t in (_parse_time(r.get("Modified_Time")) for r in records) if t), default=None)
+        self.db.upsert_sync_state(self.service, module, max_modified_time=watermark, last_sync_at=started_at)
+        return records
@@ -7,6 +7,37 @@ CREATE TABLE zoho_tokens (
     updated_at DATETIMEOFFSET DEFAULT SYSUTCDATETIME()
 );
 
+-- Per-module high-water marks for incremental sync:
+CREATE TABLE zoho_sync_state (
+    service VARCHAR(100) NOT NULL,
+    module VARCHAR(100) NOT NULL,
+    max_modified_time DATETIMEOFFSET NULL,
+    last_sync_at DATETIMEOFFSET NULL,
+    PRIMARY KEY (service, module)
+);
+
+-- Cached settings/fields metadata per module (fetched_at is a Unix timestamp):
+CREATE TABLE zoho_field_metadata (
+    service VARCHAR(100) NOT NULL,
+    module VARCHAR(100) NOT NULL,
+    fields_json NVARCHAR(MAX) NOT NULL,
+    etag VARCHAR(200) NULL,
+    fetched_at FLOAT NOT NULL,
+    PRIMARY KEY (service, module)
+);
+
+-- Per-day, per-dimension rollups for date-range metrics (day 1900-01-01 = no Created_Time):
+CREATE TABLE zoho_daily_aggregates (
+    service VARCHAR(100) NOT NULL,
+    module VARCHAR(50) NOT NULL,
+    day DATE NOT NULL,
+    dimension VARCHAR(50) NOT NULL,
+    value NVARCHAR(200) NOT NULL,
+    record_count INT NOT NULL,
+    amount FLOAT NOT NULL DEFAULT 0,
+    PRIMARY KEY (service, module, day, dimension, value)
+);
+
 -- Example insert (replace values if needed):
 INSERT INTO zoho_tokens(service, access_token, refresh_token, expires_at)
 VALUES('zoho_bigin',
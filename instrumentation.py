@@ -0,0 +1,215 @@
+# instrumentation.py
+"""
+Run-level timers, counters and peak-memory sampling.
+
+Everything is a no-op until enable() is called: timer() hands back a shared null
+context, timed() wrappers test one flag and call straight through, and count()
+returns immediately, so the hooks can stay in hot paths permanently.
+"""
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+_enabled = False
+_lock = threading.Lock()
+_timers = {}
+_samples = {}
+_counters = {}
+_started = None
+_sampler = None
+_NULL = contextlib.nullcontext()
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (Linux /proc), falling back to the peak from getrusage."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        if resource is None:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _MemorySampler(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(name="memory-sampler", daemon=True)
+        self.interval = interval
+        self.peak = _rss_bytes()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def stop(self):
+        self._stop_event.set()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def enable(sample_interval: float = 0.1):
+    """Resets all stats and starts collecting (and sampling RSS every sample_interval seconds)."""
+    global _enabled, _started, _sampler
+    with _lock:
+        _timers.clear()
+        _samples.clear()
+        _counters.clear()
+    _started = time.perf_counter()
+    if _sampler is not None:
+        _sampler.stop()
+    _sampler = _MemorySampler(sample_interval)
+    _sampler.start()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    if _sampler is not None:
+        _sampler.stop()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _record(name: str, seconds: float):
+    with _lock:
+        stat = _timers.get(name)
+        if stat is None:
+            _timers[name] = [1, seconds, seconds]
+            _samples[name] = [seconds]
+        else:
+            _samples[name].append(seconds)
+            stat[0] += 1
+            stat[1] += seconds
+            if seconds > stat[2]:
+                stat[2] = seconds
+
+
+@contextlib.contextmanager
+def _timer(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+def timer(name: str):
+    """Context manager timing the block under name (accumulates count, total and max)."""
+    return _timer(name) if _enabled else _NULL
+
+
+def timed(name: str):
+    """Decorator form of timer()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def count(name: str, n: int = 1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def _percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def reset_peak() -> Optional[float]:
+    """Returns the peak RSS (MB) seen so far and restarts peak tracking from the current RSS."""
+    if _sampler is None:
+        return None
+    peak = max(_sampler.peak, _rss_bytes())
+    _sampler.peak = _rss_bytes()
+    return round(peak / 1e6, 1)
+
+
+def snapshot() -> dict:
+    with _lock:
+        timers = {}
+        for name, (c, total, mx) in sorted(_timers.items()):
+            ordered = sorted(_samples[name])
+            timers[name] = {"count": c, "total_s": round(total, 6), "mean_s": round(total / c, 6),
+                            "p50_s": round(_percentile(ordered, 0.5), 6), "p95_s": round(_percentile(ordered, 0.95), 6),
+                            "max_s": round(mx, 6)}
+        counters = dict(sorted(_counters.items()))
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "wall_s": round(time.perf_counter() - _started, 3) if _started is not None else None,
+        "peak_rss_mb": round(max(_sampler.peak, _rss_bytes()) / 1e6, 1) if _sampler is not None else None,
+        "timers": timers,
+        "counters": counters,
+    }
+
+
+def write_report(path: str) -> dict:
+    report = snapshot()
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    return report
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text(prefix: str = "zoho") -> str:
+    """Prometheus text exposition format for the current stats."""
+    report = snapshot()
+    lines = []
+    for metric, kind, key in (("stage_seconds_total", "counter", "total_s"),
+                              ("stage_calls_total", "counter", "count"),
+                              ("stage_seconds_max", "gauge", "max_s")):
+        lines.append(f"# TYPE {prefix}_{metric} {kind}")
+        for name, stat in report["timers"].items():
+            lines.append(f'{prefix}_{metric}{{stage="{_label(name)}"}} {stat[key]}')
+    lines.append(f"# TYPE {prefix}_events_total counter")
+    for name, value in report["counters"].items():
+        lines.append(f'{prefix}_events_total{{event="{_label(name)}"}} {value}')
+    if report["peak_rss_mb"] is not None:
+        lines.append(f"# TYPE {prefix}_peak_rss_bytes gauge")
+        lines.append(f"{prefix}_peak_rss_bytes {int(report['peak_rss_mb'] * 1e6)}")
+    if report["wall_s"] is not None:
+        lines.append(f"# TYPE {prefix}_run_seconds gauge")
+        lines.append(f"{prefix}_run_seconds {report['wall_s']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str, prefix: str = "zoho"):
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(prometheus_text(prefix))
+
+
+def print_summary(top: Optional[int] = 15):
+    report = snapshot()
+    print(f"\n⏱ Run: {report['wall_s']}s, peak RSS {report['peak_rss_mb']}MB")
+    stages = sorted(report["timers"].items(), key=lambda kv: kv[1]["total_s"], reverse=True)[:top]
+    for name, stat in stages:
+        print(f"  {name:<40} {stat['total_s']:>9.3f}s  x{stat['count']}")
+    for name, value in report["counters"].items():
+        print(f"  {name:<40} {value:>10}")
@@ -1,67 +1,410 @@
 # main.py
+import argparse
 import os
-from config import Config
-from db import DB
-from token_manager import TokenManager
-from client import ZohoBiginClient
-from data_processor import DataProcessor
-from metrics import MetricsCalculator
-from exporter import MetricsExporter
-from datetime import datetime
-
-def main():
-    print("Starting Zoho Bigin Analytics (modular)...")
+from typing import TYPE_CHECKING
+import instrumentation
+from config import EXPORT_FORMATS, Config
+from datetime import datetime, time, timezone
+
+if TYPE_CHECKING:
+    from db import DB
+    from record_cache import RecordCache
+
+# The fetch/transform/export stack (pandas, SQLAlchemy, requests, pyarrow) is imported
+# inside the functions that use it, so --help and --check-config return immediately
+# and --from-cache runs never load the HTTP or ODBC layers.
+
+SERVICE_NAME = "zoho_bigin"
+
+
+def compact_frame(module: str, df):
+    from data_processor import DataProcessor
+    before = DataProcessor.memory_mb(df)
+    df = DataProcessor.compact_dtypes(df)
+    print(f"  🗜 {module}: {before:.1f}MB → {DataProcessor.memory_mb(df):.1f}MB")
+    return df
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch Zoho Bigin data, calculate metrics and export an Excel report.")
+    parser.add_argument("--from-cache", action="store_true",
+                        help="Recompute metrics and the report from the local record cache without any network calls.")
+    parser.add_argument("--streaming-excel", action="store_true",
+                        help="Write the workbook in streaming mode (fast, constant memory).")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Overlap fetching, flattening and export per module instead of running in phases.")
+    parser.add_argument("--report-json", metavar="PATH",
+                        help="Collect per-stage timings, counters and peak memory and write them as JSON.")
+    parser.add_argument("--prometheus", metavar="PATH",
+                        help="Also write the run stats in Prometheus text format (enables instrumentation).")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="Run under cProfile (main thread), dump stats to PATH and print the top entries.")
+    parser.add_argument("--batch", action="store_true",
+                        help="Report on every service row in zoho_tokens concurrently in this process.")
+    parser.add_argument("--services", metavar="NAMES",
+                        help="Comma-separated service rows to run in batch mode (implies --batch).")
+    parser.add_argument("--formats", default="xlsx",
+                        help=f"Comma-separated export formats from: {', '.join(EXPORT_FORMATS)} (default: xlsx).")
+    parser.add_argument("--start", type=date_arg, metavar="YYYY-MM-DD",
+                        help="First day of the report window (default: start of the current month).")
+    parser.add_argument("--end", type=date_arg, metavar="YYYY-MM-DD",
+                        help="Last day of the report window, inclusive (default: now).")
+    parser.add_argument("--from-aggregates", action="store_true",
+                        help="Answer the metrics from the daily aggregate store only (no fetch, no raw records).")
+    parser.add_argument("--check-config", action="store_true",
+                        help="Validate the flags and settings, print the resolved run and exit.")
+    return parser.parse_args(argv)
 
-    cfg = Config()
 
+def date_arg(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got '{value}'")
+
+
+def require_odbc(cfg) -> bool:
     if not cfg.SQL_ODBC:
         print("ERROR: SQL_ODBC not set in env. Example:")
         print('  export SQL_SERVER_ODBC="DRIVER={ODBC Driver 18 for SQL Server};SERVER=server;DATABASE=db;UID=user;PWD=pass;TrustServerCertificate=yes"')
-        return
+        return False
+    return True
 
-    db = DB(cfg.SQL_ODBC)
 
-    token_row = db.get_token_row("zoho_bigin")
+def open_client(cfg, service: str = SERVICE_NAME, db: 'DB' = None, session=None):
+    """
+    Returns (db, client) for one service row, or (None, None) if the DB or token row
+    is missing. Batch runs pass the shared db and HTTP session; each service still
+    gets its own TokenManager and RateLimiter (its own API budget).
+    """
+    from batch import tenant_name
+    from checkpoint import CheckpointStore
+    from client import ZohoBiginClient
+    from db import DB
+    from field_cache import FieldMetadataCache
+    from rate_limiter import RateLimiter
+    from token_manager import TokenManager
+    from transport import make_session
+    if db is None:
+        if not require_odbc(cfg):
+            return None, None
+        db = DB(cfg.SQL_ODBC)
+
+    token_row = db.get_token_row(service)
     if token_row is None:
-        print("No token row found for service 'zoho_bigin' in zoho_tokens table.")
+        print(f"No token row found for service '{service}' in zoho_tokens table.")
         print("Please insert a row with your refresh_token. Example SQL was provided in docs.")
-        return
+        return None, None
+
+    session = session or make_session(cfg.FETCH_CONCURRENCY)
+    limiter = RateLimiter.from_config(cfg)
+    tm = TokenManager(cfg, db, service_name=service, session=session)
+    field_cache = FieldMetadataCache(cfg.FIELD_CACHE_DIR, cfg.FIELD_CACHE_TTL_HOURS * 3600,
+                                     db=db if cfg.FIELD_CACHE_IN_DB else None, service=service)
+    checkpoints = CheckpointStore(os.path.join(cfg.CHECKPOINT_DIR, tenant_name(service)), cfg.CHECKPOINT_PAGES) \
+        if cfg.CHECKPOINT_ENABLED else None
+    client = ZohoBiginClient(tm, cfg.BASE_URL, cfg, rate_limiter=limiter, field_cache=field_cache, session=session,
+                             checkpoints=checkpoints)
+    return db, client
+
+
+def make_to_frame(cfg):
+    from data_processor import DataProcessor
+
+    def to_frame(pages, flatten=None):
+        return DataProcessor.frame_from_pages(pages, spill_rows=cfg.SPILL_ROWS or None, spill_dir=cfg.SPILL_DIR,
+                                              flatten=flatten)
+    return to_frame
 
-    tm = TokenManager(cfg, db, service_name="zoho_bigin")
-    client = ZohoBiginClient(tm, cfg.BASE_URL, cfg)
+
+class ModuleSync:
+    """Incremental-sync state for one run (inactive unless INCREMENTAL_SYNC is set)."""
+    def __init__(self, cfg, db, client, service: str = SERVICE_NAME):
+        from incremental_sync import IncrementalSync, SnapshotStore
+        self.cfg = cfg
+        self.client = client
+        self.sync = IncrementalSync(db, SnapshotStore(cfg.SNAPSHOT_DIR), service) if cfg.INCREMENTAL_SYNC else None
+        self.since = {m: self.sync.modified_since(m) for m in cfg.MODULES_TO_FETCH} if self.sync else {}
+        self.started_at = datetime.now(timezone.utc)
+
+    def finish(self, module: str, result, to_frame):
+        """
+        Merges fetched records into the snapshot (sync mode) and compacts the module
+        frame. Only called with complete fetches: a truncated one raises IncompleteFetchError.
+        """
+        from data_processor import DataProcessor
+        if self.sync:
+            records = self.sync.apply(module, result, self.started_at, full=self.since.get(module) is None)
+            print(f"  🔄 {module}: {len(records)} records in snapshot")
+            step = self.cfg.RECORDS_PER_PAGE
+            result = to_frame(records[i:i + step] for i in range(0, len(records), step))
+            result.attrs["field_types"] = DataProcessor.column_types(self.client.get_module_schema(module))
+            result = DataProcessor.normalize_datetimes(result)
+        if result is not None and not result.empty and self.cfg.COMPACT_DTYPES:
+            result = compact_frame(module, result)
+        return result
+
+
+def fetch_data_store(cfg, cache: 'RecordCache', service: str = SERVICE_NAME, db: 'DB' = None, session=None,
+                     client=None):
+    if client is None:
+        db, client = open_client(cfg, service, db, session)
+    if client is None:
+        return None
+
+    state = ModuleSync(cfg, db, client, service)
+    to_frame = make_to_frame(cfg)
+
+    # Incremental sync merges raw records into the snapshot, so it needs the records
+    # themselves; otherwise pages stream straight into per-page frame chunks.
+    frame_builder = None if state.sync else to_frame
+
+    if cfg.FETCH_CONCURRENCY > 1:
+        print(f"Fetching {len(cfg.MODULES_TO_FETCH)} modules (concurrency={cfg.FETCH_CONCURRENCY})")
+        fetched = client.fetch_modules_concurrent(cfg.MODULES_TO_FETCH, modified_since=state.since,
+                                                  to_frame=frame_builder)
+    else:
+        fetched = None
 
     data_store = {}
-    success_count = 0
     for module in cfg.MODULES_TO_FETCH:
         try:
-            records = client.fetch_module_data(module)
-            if records:
-                flattened = [DataProcessor.flatten_dict(r) for r in records]
-                import pandas as pd
-                df = pd.DataFrame(flattened)
-                df = DataProcessor.clean_column_names(df)
-                df = DataProcessor.remove_all_timezones(df)
-                data_store[module] = df
-                success_count += 1
+            if fetched is not None:
+                result = fetched[module]
+                if isinstance(result, Exception):
+                    # Already reported; the snapshot, cache and export keep their last complete state.
+                    continue
+            elif state.sync:
+                result = client.fetch_module_data(module, state.since.get(module))
+            else:
+                print(f"  📥 Fetching {module}...", end=" ", flush=True)
+                result = client.fetch_module_frame(module, to_frame)
+                print(f"✓ {len(result)} records")
+
+            result = state.finish(module, result, to_frame)
+            if result is not None and not result.empty:
+                data_store[module] = result
+                if cfg.RECORD_CACHE_ENABLED:
+                    with instrumentation.timer("cache.save"):
+                        cache.save(module, result)
         except Exception as e:
             print(f"Error fetching {module}: {e}")
 
-    print(f"Fetched {success_count}/{len(cfg.MODULES_TO_FETCH)} modules")
+    print(f"Fetched {len(data_store)}/{len(cfg.MODULES_TO_FETCH)} modules")
+    return data_store
+
+
+def run_pipeline(cfg, cache: 'RecordCache', backends, service: str = SERVICE_NAME, db: 'DB' = None, session=None,
+                 client=None):
+    """Fetch, transform and export overlapped per module; returns (data_store, metrics)."""
+    from pipeline import ReportPipeline
+    if client is None:
+        db, client = open_client(cfg, service, db, session)
+    if client is None:
+        return None, None
+    state = ModuleSync(cfg, db, client, service)
+
+    def fetch_module(module, to_frame, pool):
+        if state.sync:
+            result = client.fetch_module_data(module, state.since.get(module))
+        else:
+            result = client.fetch_module_frame(module, to_frame, pool=pool)
+        return state.finish(module, result, to_frame)
+
+    pipeline = ReportPipeline(cfg.MODULES_TO_FETCH, fetch_module, make_to_frame(cfg), backends, cfg, cache=cache)
+    return pipeline.run()
+
 
-    if success_count == 0:
+def open_aggregates(cfg, service: str = SERVICE_NAME, db: 'DB' = None):
+    """DailyAggregateStore for the service, or None if there is no database to keep it in."""
+    from aggregates import DailyAggregateStore
+    from db import DB
+    if cfg.AGGREGATES_SQL_URL:
+        db = DB.from_url(cfg.AGGREGATES_SQL_URL)
+    elif db is None:
+        if not require_odbc(cfg):
+            return None
+        db = DB(cfg.SQL_ODBC)
+    return DailyAggregateStore(db, service)
+
+
+def update_aggregates(cfg, data_store: dict, service: str = SERVICE_NAME, db: 'DB' = None):
+    """Refreshes the day buckets of every fetched module; only changed buckets are written."""
+    try:
+        store = open_aggregates(cfg, service, db)
+        if store is None:
+            return
+        with instrumentation.timer("aggregates.update"):
+            changed = {module: store.update(module, df) for module, df in data_store.items()}
+        print(f"  📅 Daily aggregates: {sum(changed.values())} buckets updated")
+    except Exception as e:
+        print(f"    ⚠ Daily aggregates not updated: {e}")
+
+
+def load_cached_data_store(cfg, cache: 'RecordCache'):
+    if not cache.available():
+        print("ERROR: --from-cache requires pyarrow (pip install pyarrow).")
+        return None
+    with instrumentation.timer("cache.load"):
+        # Arrow-backed views over the memory-mapped files: large modules are paged in
+        # as metrics and exports read them instead of being copied up front.
+        data_store = cache.load_all(cfg.MODULES_TO_FETCH, zero_copy=True)
+    for module in cfg.MODULES_TO_FETCH:
+        status = f"✓ {len(data_store[module])} rows" if module in data_store else "missing or expired"
+        print(f"  💾 {module}: {status}")
+    print(f"Loaded {len(data_store)}/{len(cfg.MODULES_TO_FETCH)} modules from cache")
+    return data_store
+
+
+def main(argv=None, cfg=None, **warm) -> bool:
+    """CLI entry point; service mode calls it per job with a fresh cfg and its warm resources."""
+    args = parse_args(argv)
+    if args.report_json or args.prometheus:
+        instrumentation.enable()
+    ok = False
+    try:
+        if args.profile:
+            import cProfile
+            import pstats
+            profiler = cProfile.Profile()
+            try:
+                ok = profiler.runcall(run, args, cfg, **warm)
+            finally:
+                profiler.dump_stats(args.profile)
+                print(f"\nProfile written to {args.profile}")
+                pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+        else:
+            ok = run(args, cfg, **warm)
+    finally:
+        if instrumentation.is_enabled():
+            instrumentation.print_summary()
+            if args.report_json:
+                instrumentation.write_report(args.report_json)
+                print(f"Run report written to {args.report_json}")
+            if args.prometheus:
+                instrumentation.write_prometheus(args.prometheus)
+                print(f"Prometheus metrics written to {args.prometheus}")
+            instrumentation.disable()
+    return ok
+
+
+def export_formats(args) -> list:
+    return [f.strip() for f in args.formats.split(",") if f.strip()]
+
+
+def run_service(cfg, args, service: str = SERVICE_NAME, tenant: str = None, db: 'DB' = None, session=None,
+                export_db: 'DB' = None, client=None, cache: 'RecordCache' = None) -> bool:
+    """
+    One report for one service row. tenant (batch runs) keeps the record cache and
+    outputs apart per service; db, session and export_db are the shared batch
+    resources. Service mode also passes its warm client and in-memory record cache.
+    Returns True if a report was produced.
+    """
+    from export_backends import build_backends, run_exports
+    from metrics import AggregateMetricsCalculator, MetricsCalculator
+    from record_cache import RecordCache
+    try:
+        backends = build_backends(export_formats(args), cfg, streaming_excel=args.streaming_excel,
+                                  db=export_db, tenant=tenant)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return False
+    if cache is None:
+        cache_dir = os.path.join(cfg.RECORD_CACHE_DIR, tenant) if tenant else cfg.RECORD_CACHE_DIR
+        cache = RecordCache(cache_dir, ttl_seconds=cfg.RECORD_CACHE_TTL_HOURS * 3600)
+
+    if args.from_aggregates:
+        store = open_aggregates(cfg, service, db)
+        if store is None:
+            return False
+        metrics = AggregateMetricsCalculator(store, cfg).calculate_all_metrics()
+        return run_exports(backends, {}, metrics)
+
+    if args.pipeline and not args.from_cache:
+        data_store, metrics = run_pipeline(cfg, cache, backends, service, db, session, client)
+        if not data_store:
+            print("No data fetched; exiting.")
+        elif cfg.AGGREGATES_ENABLED:
+            update_aggregates(cfg, data_store, service, db)
+        return bool(data_store) and metrics is not None
+
+    if args.from_cache:
+        data_store = load_cached_data_store(cfg, cache)
+    else:
+        data_store = fetch_data_store(cfg, cache, service, db, session, client)
+
+    if not data_store:
         print("No data fetched; exiting.")
-        return
+        return False
+    if cfg.AGGREGATES_ENABLED and not args.from_cache:
+        update_aggregates(cfg, data_store, service, db)
 
     calc = MetricsCalculator(data_store, cfg)
     metrics = calc.calculate_all_metrics()
 
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    fname = f"Zoho_Analytics_{ts}.xlsx"
-    ok = MetricsExporter.create_excel(data_store, metrics, fname)
-    if ok:
-        print(f"Report created: {fname}")
-    else:
-        print("Failed to create report.")
+    return run_exports(backends, data_store, metrics)
+
+
+def job_config(args, cfg=None):
+    """
+    Config for one run with the report window resolved from --start/--end (default:
+    the current month as of now). Returns None, after printing why, if the flags are invalid.
+    """
+    cfg = cfg or Config()
+    if args.start:
+        cfg.MONTH_START = args.start
+    if args.end:
+        cfg.MONTH_END = datetime.combine(args.end.date(), time.max)
+    if cfg.MONTH_START > cfg.MONTH_END:
+        print("ERROR: --start is after --end")
+        return None
+    unknown = [f for f in export_formats(args) if f not in EXPORT_FORMATS]
+    if unknown:
+        print(f"ERROR: Unknown export format '{unknown[0]}'. Choose from: {', '.join(EXPORT_FORMATS)}")
+        return None
+    return cfg
+
+
+def check_config(cfg, args) -> bool:
+    """--check-config: reports what the run would do and the settings it is missing."""
+    print(f"Window:   {cfg.MONTH_START:%Y-%m-%d %H:%M} to {cfg.MONTH_END:%Y-%m-%d %H:%M}")
+    print(f"Modules:  {', '.join(cfg.MODULES_TO_FETCH)}")
+    print(f"Formats:  {', '.join(export_formats(args))}")
+    problems = []
+    needs_db = not args.from_cache and not (args.from_aggregates and cfg.AGGREGATES_SQL_URL)
+    if needs_db and not cfg.SQL_ODBC:
+        problems.append("SQL_SERVER_ODBC is not set (needed for tokens and sync state)")
+    if "sql" in export_formats(args) and not (cfg.EXPORT_SQL_URL or cfg.SQL_ODBC):
+        problems.append("the sql format needs ZOHO_EXPORT_SQL_URL or SQL_SERVER_ODBC")
+    if cfg.FETCH_CONCURRENCY < 1 or cfg.RECORDS_PER_PAGE < 1 or cfg.MAX_RETRIES < 1:
+        problems.append("ZOHO_FETCH_CONCURRENCY, ZOHO_RECORDS_PER_PAGE and ZOHO_MAX_RETRIES must be at least 1")
+    for problem in problems:
+        print(f"    ⚠ {problem}")
+    print("Config OK." if not problems else f"{len(problems)} problem(s) found.")
+    return not problems
+
+
+def run(args, cfg=None, **warm) -> bool:
+    """
+    One CLI run. Service mode passes a fresh cfg per job and its warm resources
+    (db, session, client, cache) as keyword arguments for run_service.
+    """
+    print("Starting Zoho Bigin Analytics (modular)...")
+
+    cfg = job_config(args, cfg)
+    if cfg is None:
+        return False
+    if args.check_config:
+        return check_config(cfg, args)
+
+    if args.batch or args.services:
+        from batch import run_batch
+        services = [s.strip() for s in args.services.split(",") if s.strip()] if args.services else None
+        results = run_batch(cfg, args, run_service, services)
+        return bool(results) and all(status == "ok" for status in results.values())
+
+    return run_service(cfg, args, **warm)
+
 
 if __name__ == "__main__":
     main()
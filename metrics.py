@@ -1,18 +1,39 @@
 # metrics.py
+import numpy as np
 import pandas as pd
 from data_processor import DataProcessor
+from relationships import RelationshipIndex, group_count
+import instrumentation
+
+WON_PATTERN = 'won|closed won|success'
+LOST_PATTERN = 'lost|closed lost|dead'
 
 class MetricsCalculator:
+    """
+    Computes all report metrics from shared per-module intermediates: each module
+    is timezone-normalised, date-parsed and date-filtered once, and each stage/
+    status column is lower-cased once (per distinct value) for pattern matching.
+    """
+    # Modules the metrics read; the report pipeline starts metrics once these land.
+    REQUIRED_MODULES = ("Contacts", "Accounts", "Pipelines", "Calls", "Events", "Tasks")
+
     def __init__(self, data_store: dict, config):
         self.data = data_store
         self.config = config
         self.metrics = {}
+        self._filtered = {}
+        self._lowered = {}
+        self._windows = {}
 
+    @instrumentation.timed("metrics.total")
     def calculate_all_metrics(self):
         print("\n" + "="*60)
         print(" 📊 CALCULATING BUSINESS METRICS")
         print("="*60)
 
+        self._filtered = {}
+        self._lowered = {}
+        self._windows = {}
         self.metrics = {
             'summary': self._calculate_summary_metrics(),
             'lead_source': self._calculate_lead_source_distribution(),
@@ -24,23 +45,79 @@ class MetricsCalculator:
             'lead_quality': self._calculate_lead_quality_metrics(),
             'quotes': self._calculate_quote_metrics(),
             'deals': self._calculate_deal_metrics(),
+            'grouped': self._calculate_grouped_metrics(),
         }
         return self.metrics
 
     def _get_dataframe(self, module: str):
         return self.data.get(module, pd.DataFrame())
 
+    def _get_filtered(self, module: str) -> pd.DataFrame:
+        if module not in self._filtered:
+            self._filtered[module] = self._filter_by_date(self._get_dataframe(module))
+        return self._filtered[module]
+
+    def _window(self, module: str) -> np.ndarray:
+        """Row mask of the full module frame for Created_Time within the report window."""
+        if module not in self._windows:
+            df = self._get_dataframe(module)
+            try:
+                self._windows[module] = self._date_mask(DataProcessor.normalize_datetimes(df))
+            except Exception:
+                self._windows[module] = np.ones(len(df), dtype=bool)
+        return self._windows[module]
+
+    def _contains(self, module: str, col: str, pattern: str, filtered: bool = True) -> pd.Series:
+        """
+        Boolean mask equal to df[col].astype(str).str.lower().str.contains(pattern)
+        on the module's date-filtered frame (or the full frame with filtered=False),
+        matching each distinct value once.
+        """
+        frame = self._get_filtered(module) if filtered else self._get_dataframe(module)
+        key = (module, col, filtered)
+        if key not in self._lowered:
+            series = frame[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Missing values (code -1) never match, as with astype(str) on NaN.
+                codes = series.cat.codes.to_numpy()
+                uniques = list(series.cat.categories.astype(str)) + [None]
+            else:
+                codes, uniques = pd.factorize(series.astype(str), use_na_sentinel=False)
+            self._lowered[key] = (codes, pd.Series(uniques, dtype=object).str.lower())
+        codes, lowered = self._lowered[key]
+        hits = lowered.str.contains(pattern, na=False, regex=True).to_numpy(dtype=bool)
+        return pd.Series(hits[codes], index=frame.index)
+
+    @staticmethod
+    def _value_counts(series: pd.Series) -> pd.Series:
+        """
+        series.value_counts(), except categoricals count only observed values and
+        break ties by first occurrence, so results match the object-dtype column.
+        """
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            return series.value_counts()
+        codes = series.cat.codes.to_numpy()
+        present = codes[codes >= 0]
+        uniq, first = np.unique(present, return_index=True)
+        order = uniq[np.argsort(first, kind="stable")]
+        counts = np.bincount(present, minlength=len(series.cat.categories))[order]
+        index = pd.Index(series.cat.categories.take(order), name=series.name)
+        return pd.Series(counts, index=index, name="count").sort_values(ascending=False, kind="stable")
+
+    def _date_mask(self, df: pd.DataFrame, date_col: str = 'Created_Time') -> np.ndarray:
+        dates = pd.to_datetime(df[date_col], errors='coerce')
+        return ((dates >= self.config.MONTH_START) & (dates <= self.config.MONTH_END)).to_numpy(dtype=bool)
+
     def _filter_by_date(self, df: pd.DataFrame, date_col: str = 'Created_Time'):
         if df.empty or date_col not in df.columns:
             return df
         try:
-            df = DataProcessor.remove_all_timezones(df)
-            df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-            mask = (df[date_col] >= self.config.MONTH_START) & (df[date_col] <= self.config.MONTH_END)
-            return df[mask]
+            df = DataProcessor.normalize_datetimes(df)
+            return df[self._date_mask(df, date_col)]
         except:
             return df
 
+    @instrumentation.timed("metrics.summary_metrics")
     def _calculate_summary_metrics(self):
         return {
             'total_contacts': len(self._get_dataframe('Contacts')),
@@ -51,6 +128,7 @@ class MetricsCalculator:
             'date_range': f"{self.config.MONTH_START.strftime('%Y-%m-%d')} to {self.config.MONTH_END.strftime('%Y-%m-%d')}"
         }
 
+    @instrumentation.timed("metrics.lead_source_distribution")
     def _calculate_lead_source_distribution(self):
         df = self._get_dataframe('Contacts')
         if df.empty:
@@ -61,11 +139,12 @@ class MetricsCalculator:
                 lead_col = col; break
         if not lead_col:
             return pd.DataFrame(columns=['Lead_Source', 'Count', 'Percentage'])
-        dist = df[lead_col].value_counts().reset_index()
+        dist = self._value_counts(df[lead_col]).reset_index()
         dist.columns = ['Lead_Source', 'Count']
         dist['Percentage'] = (dist['Count'] / dist['Count'].sum() * 100).round(2)
         return dist
 
+    @instrumentation.timed("metrics.industry_distribution")
     def _calculate_industry_distribution(self):
         df = self._get_dataframe('Accounts')
         if df.empty:
@@ -73,13 +152,14 @@ class MetricsCalculator:
         industry_col = next((c for c in df.columns if 'industry' in c.lower()), None)
         if not industry_col:
             return pd.DataFrame(columns=['Industry', 'Count', 'Percentage'])
-        dist = df[industry_col].value_counts().reset_index()
+        dist = self._value_counts(df[industry_col]).reset_index()
         dist.columns = ['Industry', 'Count']
         dist['Percentage'] = (dist['Count'] / dist['Count'].sum() * 100).round(2)
         return dist
 
+    @instrumentation.timed("metrics.meeting_metrics")
     def _calculate_meeting_metrics(self):
-        df = self._filter_by_date(self._get_dataframe('Events'))
+        df = self._get_filtered('Events')
         if df.empty:
             return {'total_meetings': 0, 'meetings_this_month': 0, 'avg_meetings_per_day': 0}
         total = len(df)
@@ -87,12 +167,14 @@ class MetricsCalculator:
         avg = total / days if days > 0 else 0
         return {'total_meetings': total, 'meetings_this_month': total, 'avg_meetings_per_day': round(avg, 2)}
 
+    @instrumentation.timed("metrics.lead_metrics")
     def _calculate_lead_metrics(self):
-        df = self._filter_by_date(self._get_dataframe('Contacts'))
+        df = self._get_filtered('Contacts')
         return {'total_leads_generated': len(df), 'new_leads_this_month': len(df)}
 
+    @instrumentation.timed("metrics.call_metrics")
     def _calculate_call_metrics(self):
-        df = self._filter_by_date(self._get_dataframe('Calls'))
+        df = self._get_filtered('Calls')
         if df.empty:
             return {'total_calls': 0, 'calls_this_month': 0, 'avg_calls_per_day': 0}
         total = len(df)
@@ -100,48 +182,312 @@ class MetricsCalculator:
         avg = total / days if days > 0 else 0
         return {'total_calls': total, 'calls_this_month': total, 'avg_calls_per_day': round(avg, 2)}
 
+    @instrumentation.timed("metrics.email_metrics")
     def _calculate_email_metrics(self):
-        tasks_df = self._filter_by_date(self._get_dataframe('Tasks'))
+        tasks_df = self._get_filtered('Tasks')
         email_tasks = 0
         if not tasks_df.empty:
-            for col in tasks_df.columns:
-                if 'subject' in col.lower() or 'type' in col.lower():
-                    email_tasks = tasks_df[tasks_df[col].astype(str).str.lower().str.contains('email|mail', na=False, regex=True)].shape[0]
-                    break
+            col = next((c for c in tasks_df.columns if 'subject' in c.lower() or 'type' in c.lower()), None)
+            if col:
+                email_tasks = int(self._contains('Tasks', col, 'email|mail').sum())
         return {'email_related_tasks': email_tasks, 'note': 'Email tracking requires Campaign module or Email integration'}
 
+    @instrumentation.timed("metrics.lead_quality_metrics")
     def _calculate_lead_quality_metrics(self):
-        df = self._filter_by_date(self._get_dataframe('Contacts'))
+        df = self._get_filtered('Contacts')
         if df.empty:
             return {'total_leads': 0, 'junk_leads': 0, 'prospect_leads': 0, 'qualified_leads': 0}
         status_col = next((c for c in df.columns if any(k in c.lower() for k in ['status','stage','rating'])), None)
         if not status_col:
             return {'total_leads': len(df), 'junk_leads': 0, 'prospect_leads': 0, 'qualified_leads': len(df), 'note': 'No status/stage column'}
-        status_counts = df[status_col].value_counts().to_dict()
+        status_counts = self._value_counts(df[status_col]).to_dict()
         junk = sum(c for s, c in status_counts.items() if any(k in str(s).lower() for k in ['junk','disqualified','lost','invalid','dead']))
         prospect = sum(c for s, c in status_counts.items() if any(k in str(s).lower() for k in ['prospect','future','nurture','cold','warm']))
         qualified = len(df) - junk - prospect
         return {'total_leads': len(df), 'junk_leads': junk, 'prospect_leads': prospect, 'qualified_leads': qualified, 'status_breakdown': status_counts}
 
+    @instrumentation.timed("metrics.quote_metrics")
     def _calculate_quote_metrics(self):
-        df = self._filter_by_date(self._get_dataframe('Pipelines'))
+        df = self._get_filtered('Pipelines')
         if df.empty:
             return {'total_quotes': 0, 'total_quote_value': 0, 'average_quote_value': 0}
-        stage_col = next((c for c in df.columns if 'stage' in c.lower() or 'status' in c.lower()), None)
-        quotes_df = df[df[stage_col].astype(str).str.lower().str.contains('quote|proposal|quotation', na=False, regex=True)] if stage_col else df
+        stage_col = self._stage_column(df)
+        quotes_df = df[self._contains('Pipelines', stage_col, 'quote|proposal|quotation')] if stage_col else df
         amount_col = next((c for c in df.columns if 'amount' in c.lower() or 'value' in c.lower()), None)
         total_value = pd.to_numeric(quotes_df[amount_col], errors='coerce').fillna(0).sum() if amount_col else 0
         return {'total_quotes': len(quotes_df), 'total_quote_value': float(total_value), 'average_quote_value': float(total_value / len(quotes_df)) if len(quotes_df) > 0 else 0}
 
+    @instrumentation.timed("metrics.deal_metrics")
     def _calculate_deal_metrics(self):
-        df = self._filter_by_date(self._get_dataframe('Pipelines'))
+        df = self._get_filtered('Pipelines')
         if df.empty:
             return {'total_deals': 0, 'deals_won': 0, 'deals_lost': 0, 'total_won_value': 0, 'win_rate': 0}
-        stage_col = next((c for c in df.columns if 'stage' in c.lower() or 'status' in c.lower()), None)
-        won = df[df[stage_col].astype(str).str.lower().str.contains('won|closed won|success', na=False, regex=True)] if stage_col else pd.DataFrame()
-        lost = df[df[stage_col].astype(str).str.lower().str.contains('lost|closed lost|dead', na=False, regex=True)] if stage_col else pd.DataFrame()
+        stage_col = self._stage_column(df)
+        won = df[self._contains('Pipelines', stage_col, WON_PATTERN)] if stage_col else pd.DataFrame()
+        lost = df[self._contains('Pipelines', stage_col, LOST_PATTERN)] if stage_col else pd.DataFrame()
         amount_col = next((c for c in won.columns if 'amount' in c.lower() or 'value' in c.lower()), None)
         total_value = pd.to_numeric(won[amount_col], errors='coerce').fillna(0).sum() if amount_col else 0
         total_closed = len(won) + len(lost)
         win_rate = (len(won) / total_closed * 100) if total_closed > 0 else 0
         return {'total_deals': len(df), 'deals_won': len(won), 'deals_lost': len(lost), 'total_won_value': float(total_value), 'win_rate': round(win_rate, 2)}
+
+
+    @staticmethod
+    def _column(df: pd.DataFrame, *words: str):
+        return next((c for c in df.columns if all(w in c.lower() for w in words)), None)
+
+    @staticmethod
+    def _stage_column(df: pd.DataFrame):
+        """First stage or status column; the deal, quote and grouped metrics must agree on it."""
+        return next((c for c in df.columns if 'stage' in c.lower() or 'status' in c.lower()), None)
+
+    @staticmethod
+    def _win_rate(won: np.ndarray, lost: np.ndarray) -> np.ndarray:
+        closed = won + lost
+        return np.round(np.divide(won * 100.0, closed, out=np.zeros(len(closed)), where=closed > 0), 2)
+
+    def _deal_masks(self):
+        """In-window, won and lost masks and amounts over every fetched deal, in index row order."""
+        df = self._get_dataframe('Pipelines')
+        window = self._window('Pipelines')
+        stage_col = self._stage_column(df)
+        if df.empty or not stage_col:
+            none = np.zeros(len(df), dtype=bool)
+            won, lost = none, none
+        else:
+            won = self._contains('Pipelines', stage_col, WON_PATTERN, filtered=False).to_numpy()
+            lost = self._contains('Pipelines', stage_col, LOST_PATTERN, filtered=False).to_numpy()
+        amount_col = next((c for c in df.columns if 'amount' in c.lower() or 'value' in c.lower()), None)
+        amount = pd.to_numeric(df[amount_col], errors='coerce').fillna(0).to_numpy(dtype=float) \
+            if amount_col else np.zeros(len(df))
+        return window, won, lost, amount, stage_col
+
+    @instrumentation.timed("metrics.grouped_metrics")
+    def _calculate_grouped_metrics(self):
+        """
+        Per-owner, per-account, per-stage and per-lead-source tables, grouped over the
+        integer codes of a RelationshipIndex. Deals, leads and activities count when
+        created in the report window; contacts per account count all time.
+        """
+        index = RelationshipIndex.build(self.data)
+        deals = self._deal_masks()
+        return {
+            'by_owner': self._grouped_by_owner(index, deals),
+            'by_account': self._grouped_by_account(index, deals),
+            'by_stage': self._grouped_by_stage(deals),
+            'by_lead_source': self._grouped_by_lead_source(index, deals),
+        }
+
+    def _grouped_by_owner(self, index: RelationshipIndex, deals) -> pd.DataFrame:
+        columns = ['Owner', 'Owner_Id', 'Leads', 'Deals', 'Deals_Won', 'Deals_Lost', 'Won_Value', 'Win_Rate',
+                   'Calls', 'Meetings', 'Tasks']
+        size = len(index.owner_ids)
+        if not size:
+            return pd.DataFrame(columns=columns)
+        window, won, lost, amount, _ = deals
+        owner = index.owner('Pipelines')
+        deals_won = group_count(owner, size, window & won)
+        deals_lost = group_count(owner, size, window & lost)
+        grouped = pd.DataFrame({
+            'Owner': index.owner_names, 'Owner_Id': np.asarray(index.owner_ids, dtype=object),
+            'Leads': group_count(index.owner('Contacts'), size, self._window('Contacts')),
+            'Deals': group_count(owner, size, window),
+            'Deals_Won': deals_won, 'Deals_Lost': deals_lost,
+            'Won_Value': group_count(owner, size, window & won, amount).astype(float),
+            'Win_Rate': self._win_rate(deals_won, deals_lost),
+            'Calls': group_count(index.owner('Calls'), size, self._window('Calls')),
+            'Meetings': group_count(index.owner('Events'), size, self._window('Events')),
+            'Tasks': group_count(index.owner('Tasks'), size, self._window('Tasks')),
+        }, columns=columns)
+        active = grouped[['Leads', 'Deals', 'Calls', 'Meetings', 'Tasks']].to_numpy().any(axis=1)
+        return grouped[active].sort_values(['Won_Value', 'Deals', 'Leads'], ascending=False, kind='stable') \
+            .reset_index(drop=True)
+
+    def _grouped_by_account(self, index: RelationshipIndex, deals) -> pd.DataFrame:
+        columns = ['Account', 'Account_Id', 'Owner', 'Contacts', 'Deals', 'Deals_Won', 'Won_Value',
+                   'Calls', 'Meetings', 'Tasks']
+        accounts = index.frames.get('Accounts')
+        if accounts is None:
+            return pd.DataFrame(columns=columns)
+        size = len(accounts)
+        window, won, _, amount, _ = deals
+        account = index.account('Pipelines')
+        owner = index.owner('Accounts')
+        name_col = 'Account_Name' if 'Account_Name' in accounts.columns else 'id'
+        grouped = pd.DataFrame({
+            'Account': accounts[name_col].to_numpy(dtype=object),
+            'Account_Id': accounts['id'].to_numpy(dtype=object),
+            'Owner': np.where(owner >= 0, index.owner_names[np.maximum(owner, 0)] if len(index.owner_names) else None,
+                              None),
+            'Contacts': group_count(index.link('Contacts', 'Accounts'), size),
+            'Deals': group_count(account, size, window),
+            'Deals_Won': group_count(account, size, window & won),
+            'Won_Value': group_count(account, size, window & won, amount).astype(float),
+            'Calls': group_count(index.account('Calls'), size, self._window('Calls')),
+            'Meetings': group_count(index.account('Events'), size, self._window('Events')),
+            'Tasks': group_count(index.account('Tasks'), size, self._window('Tasks')),
+        }, columns=columns)
+        active = grouped[['Contacts', 'Deals', 'Calls', 'Meetings', 'Tasks']].to_numpy().any(axis=1)
+        return grouped[active].sort_values(['Won_Value', 'Deals', 'Contacts'], ascending=False, kind='stable') \
+            .reset_index(drop=True)
+
+    def _grouped_by_stage(self, deals) -> pd.DataFrame:
+        columns = ['Stage', 'Deals', 'Amount', 'Avg_Amount', 'Percentage']
+        window, _, _, amount, stage_col = deals
+        if not stage_col or not window.any():
+            return pd.DataFrame(columns=columns)
+        codes, stages = pd.factorize(self._get_dataframe('Pipelines')[stage_col].to_numpy()[window])
+        count = group_count(codes, len(stages))
+        total = group_count(codes, len(stages), weights=amount[window]).astype(float)
+        grouped = pd.DataFrame({'Stage': np.asarray(stages, dtype=object), 'Deals': count, 'Amount': total,
+                                'Avg_Amount': np.round(total / np.maximum(count, 1), 2)}, columns=columns)
+        grouped['Percentage'] = (grouped['Deals'] / window.sum() * 100).round(2)
+        return grouped.sort_values(['Deals', 'Amount'], ascending=False, kind='stable').reset_index(drop=True)
+
+    def _grouped_by_lead_source(self, index: RelationshipIndex, deals) -> pd.DataFrame:
+        """Deals by lead source: the deal's own Lead_Source, else its contact's."""
+        columns = ['Lead_Source', 'Deals', 'Deals_Won', 'Deals_Lost', 'Won_Value', 'Win_Rate']
+        window, won, lost, amount, _ = deals
+        pipelines = self._get_dataframe('Pipelines')
+        if not window.any():
+            return pd.DataFrame(columns=columns)
+        source = pd.Series(None, index=range(len(pipelines)), dtype=object)
+        deal_col = self._column(pipelines, 'lead', 'source')
+        if deal_col:
+            source = pipelines[deal_col].astype(object).reset_index(drop=True)
+        contacts = self._get_dataframe('Contacts')
+        contact_col = self._column(contacts, 'lead', 'source')
+        contact = index.link('Pipelines', 'Contacts')
+        if contact_col and contact.size:
+            via = contacts[contact_col].to_numpy(dtype=object)[np.maximum(contact, 0)]
+            source = source.where(source.notna(), pd.Series(np.where(contact >= 0, via, None), dtype=object))
+        codes, sources = pd.factorize(source)
+        size = len(sources)
+        deals_won = group_count(codes, size, window & won)
+        deals_lost = group_count(codes, size, window & lost)
+        grouped = pd.DataFrame({
+            'Lead_Source': np.asarray(sources, dtype=object), 'Deals': group_count(codes, size, window),
+            'Deals_Won': deals_won, 'Deals_Lost': deals_lost,
+            'Won_Value': group_count(codes, size, window & won, amount).astype(float),
+            'Win_Rate': self._win_rate(deals_won, deals_lost),
+        }, columns=columns)
+        grouped = grouped[grouped['Deals'] > 0]
+        return grouped.sort_values(['Won_Value', 'Deals'], ascending=False, kind='stable').reset_index(drop=True)
+
+
+class AggregateMetricsCalculator(MetricsCalculator):
+    """
+    The same metrics answered from a DailyAggregateStore: summary and distributions
+    sum every bucket, the date-filtered metrics sum the day buckets between
+    MONTH_START and MONTH_END (whole days). Cost is O(days x values), not O(records).
+    Distribution ties are ordered by value rather than first occurrence.
+    """
+    def __init__(self, store, config):
+        super().__init__({}, config)
+        self.store = store
+
+    def _calculate_grouped_metrics(self):
+        # Grouping across modules needs the records themselves, not day buckets.
+        return {}
+
+    def _range(self):
+        return self.config.MONTH_START.date(), self.config.MONTH_END.date()
+
+    def _count(self, module: str, dated: bool = True) -> int:
+        return self.store.total(module, *(self._range() if dated else ()))[0]
+
+    def _buckets(self, module: str, dimension: str, dated: bool = True) -> pd.DataFrame:
+        return self.store.query(module, dimension, *(self._range() if dated else ()))
+
+    def _matching(self, buckets: pd.DataFrame, pattern: str) -> pd.DataFrame:
+        return buckets[buckets['value'].str.lower().str.contains(pattern, na=False, regex=True)]
+
+    @staticmethod
+    def _distribution(buckets: pd.DataFrame, name: str) -> pd.DataFrame:
+        dist = pd.DataFrame({name: buckets['value'], 'Count': buckets['record_count'].astype(int)})
+        dist['Percentage'] = (dist['Count'] / dist['Count'].sum() * 100).round(2)
+        return dist.reset_index(drop=True)
+
+    @instrumentation.timed("metrics.summary_metrics")
+    def _calculate_summary_metrics(self):
+        return {
+            'total_contacts': self._count('Contacts', dated=False),
+            'total_accounts': self._count('Accounts', dated=False),
+            'total_deals': self._count('Pipelines', dated=False),
+            'total_calls': self._count('Calls', dated=False),
+            'total_meetings': self._count('Events', dated=False),
+            'date_range': f"{self.config.MONTH_START.strftime('%Y-%m-%d')} to {self.config.MONTH_END.strftime('%Y-%m-%d')}"
+        }
+
+    @instrumentation.timed("metrics.lead_source_distribution")
+    def _calculate_lead_source_distribution(self):
+        return self._distribution(self._buckets('Contacts', 'lead_source', dated=False), 'Lead_Source')
+
+    @instrumentation.timed("metrics.industry_distribution")
+    def _calculate_industry_distribution(self):
+        return self._distribution(self._buckets('Accounts', 'industry', dated=False), 'Industry')
+
+    def _per_day(self, module: str, key: str):
+        total = self._count(module)
+        if not total:
+            return {f'total_{key}': 0, f'{key}_this_month': 0, f'avg_{key}_per_day': 0}
+        days = (self.config.MONTH_END - self.config.MONTH_START).days + 1
+        avg = total / days if days > 0 else 0
+        return {f'total_{key}': total, f'{key}_this_month': total, f'avg_{key}_per_day': round(avg, 2)}
+
+    @instrumentation.timed("metrics.meeting_metrics")
+    def _calculate_meeting_metrics(self):
+        return self._per_day('Events', 'meetings')
+
+    @instrumentation.timed("metrics.lead_metrics")
+    def _calculate_lead_metrics(self):
+        total = self._count('Contacts')
+        return {'total_leads_generated': total, 'new_leads_this_month': total}
+
+    @instrumentation.timed("metrics.call_metrics")
+    def _calculate_call_metrics(self):
+        return self._per_day('Calls', 'calls')
+
+    @instrumentation.timed("metrics.email_metrics")
+    def _calculate_email_metrics(self):
+        email_tasks = int(self._buckets('Tasks', 'email_tasks')['record_count'].sum())
+        return {'email_related_tasks': email_tasks, 'note': 'Email tracking requires Campaign module or Email integration'}
+
+    @instrumentation.timed("metrics.lead_quality_metrics")
+    def _calculate_lead_quality_metrics(self):
+        total = self._count('Contacts')
+        if not total:
+            return {'total_leads': 0, 'junk_leads': 0, 'prospect_leads': 0, 'qualified_leads': 0}
+        buckets = self._buckets('Contacts', 'status')
+        if buckets.empty:
+            # No status buckets: the Contacts frame had no status/stage/rating column.
+            return {'total_leads': total, 'junk_leads': 0, 'prospect_leads': 0, 'qualified_leads': total, 'note': 'No status/stage column'}
+        status_counts = {r.value: int(r.record_count) for r in buckets.itertuples(index=False)}
+        junk = int(self._matching(buckets, 'junk|disqualified|lost|invalid|dead')['record_count'].sum())
+        prospect = int(self._matching(buckets, 'prospect|future|nurture|cold|warm')['record_count'].sum())
+        qualified = total - junk - prospect
+        return {'total_leads': total, 'junk_leads': junk, 'prospect_leads': prospect, 'qualified_leads': qualified, 'status_breakdown': status_counts}
+
+    @instrumentation.timed("metrics.quote_metrics")
+    def _calculate_quote_metrics(self):
+        total, amount = self.store.total('Pipelines', *self._range())
+        if not total:
+            return {'total_quotes': 0, 'total_quote_value': 0, 'average_quote_value': 0}
+        stages = self._buckets('Pipelines', 'stage')
+        if not stages.empty:
+            quotes = self._matching(stages, 'quote|proposal|quotation')
+            total, amount = int(quotes['record_count'].sum()), float(quotes['amount'].sum())
+        return {'total_quotes': total, 'total_quote_value': float(amount), 'average_quote_value': float(amount / total) if total > 0 else 0}
+
+    @instrumentation.timed("metrics.deal_metrics")
+    def _calculate_deal_metrics(self):
+        total = self._count('Pipelines')
+        if not total:
+            return {'total_deals': 0, 'deals_won': 0, 'deals_lost': 0, 'total_won_value': 0, 'win_rate': 0}
+        stages = self._buckets('Pipelines', 'stage')
+        won = self._matching(stages, WON_PATTERN)
+        lost = self._matching(stages, LOST_PATTERN)
+        deals_won, deals_lost = int(won['record_count'].sum()), int(lost['record_count'].sum())
+        total_closed = deals_won + deals_lost
+        win_rate = (deals_won / total_closed * 100) if total_closed > 0 else 0
+        return {'total_deals': total, 'deals_won': deals_won, 'deals_lost': deals_lost, 'total_won_value': float(won['amount'].sum()), 'win_rate': round(win_rate, 2)}
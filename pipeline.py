@@ -0,0 +1,144 @@
+# pipeline.py
+import multiprocessing
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+from data_processor import DataProcessor
+from metrics import MetricsCalculator
+import instrumentation
+
+
+def ordered_map(executor, fn: Callable, items, max_pending: int):
+    """executor.map that keeps at most max_pending items in flight and yields in input order."""
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+class ReportPipeline:
+    """
+    Staged report run: modules are fetched concurrently and each one moves through
+    fetch → flatten/clean → cache/export on its own, instead of every module waiting
+    for the slowest. Page flattening runs in a process pool so it doesn't compete
+    with network I/O for the GIL. Finished frames pass through a bounded queue to a
+    single sink thread that writes the record cache and feeds the export backends;
+    metrics start on a side thread as soon as MetricsCalculator.REQUIRED_MODULES
+    have landed. End-to-end time approaches the slowest module rather than the sum.
+
+    fetch_module(module, to_frame, pool) must return the module's finished frame;
+    to_frame(pages) is supplied by the pipeline and flattens through the process pool.
+    """
+    def __init__(self, modules: List[str], fetch_module: Callable, to_frame: Callable, backends: list,
+                 config, cache=None):
+        self.modules = list(modules)
+        self.fetch_module = fetch_module
+        self.to_frame = to_frame
+        self.backends = backends
+        self.config = config
+        self.cache = cache
+        self.flatten_workers = max(0, config.PIPELINE_FLATTEN_WORKERS)
+        self.queue_size = max(1, config.PIPELINE_QUEUE_SIZE)
+
+    def _fetch_worker(self, module: str, ready: queue.Queue, page_pool, flatten):
+        try:
+            df = self.fetch_module(module, lambda pages: self.to_frame(pages, flatten=flatten), page_pool)
+            ready.put((module, df, None))
+        except Exception as e:
+            ready.put((module, None, e))
+
+    def _start_metrics(self, data_store: dict):
+        result = {}
+
+        def run():
+            try:
+                result["metrics"] = MetricsCalculator(dict(data_store), self.config).calculate_all_metrics()
+            except Exception as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=run, name="metrics", daemon=True)
+        thread.start()
+        return thread, result
+
+    def run(self, run_at: Optional[datetime] = None):
+        """Returns (data_store, metrics); metrics is None when no module could be fetched or metrics failed."""
+        run_at = run_at or datetime.now()
+        ready = queue.Queue(maxsize=self.queue_size)
+        concurrency = max(1, self.config.FETCH_CONCURRENCY)
+        # Fetch threads are already running, and forking a multithreaded process can
+        # deadlock on locks they hold, so workers start from a clean forkserver/spawn.
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        proc_pool = ProcessPoolExecutor(max_workers=self.flatten_workers, mp_context=multiprocessing.get_context(method)) \
+            if self.flatten_workers else None
+        flatten = partial(ordered_map, proc_pool, DataProcessor.page_to_frame,
+                          max_pending=self.flatten_workers * 2) if proc_pool else None
+
+        data_store: Dict[str, pd.DataFrame] = {}
+        waiting = set(MetricsCalculator.REQUIRED_MODULES)
+        metrics_thread = metrics_result = None
+        metrics = None
+        started = False
+        print(f"Pipeline: {len(self.modules)} modules (concurrency={concurrency}, "
+              f"flatten workers={self.flatten_workers or 'inline'})")
+        try:
+            try:
+                with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="page") as page_pool, \
+                        ThreadPoolExecutor(max_workers=min(len(self.modules), concurrency) or 1,
+                                           thread_name_prefix="module") as module_pool:
+                    for module in self.modules:
+                        module_pool.submit(self._fetch_worker, module, ready, page_pool, flatten)
+
+                    for _ in self.modules:
+                        module, df, error = ready.get()
+                        waiting.discard(module)
+                        if error is not None:
+                            print(f"Error fetching {module}: {error}")
+                        elif df is not None and not df.empty:
+                            print(f"  ✓ {module}: {len(df)} records")
+                            data_store[module] = df
+                            if not started:
+                                for backend in self.backends:
+                                    backend.begin(run_at)
+                                started = True
+                            if self.cache is not None and self.config.RECORD_CACHE_ENABLED:
+                                with instrumentation.timer("cache.save"):
+                                    self.cache.save(module, df)
+                            for backend in self.backends:
+                                with instrumentation.timer(f"export.{backend.name}"):
+                                    backend.add_module(module, df)
+                        if not waiting and metrics_thread is None and data_store:
+                            metrics_thread, metrics_result = self._start_metrics(data_store)
+            finally:
+                if proc_pool:
+                    proc_pool.shutdown(cancel_futures=True)
+
+            print(f"Fetched {len(data_store)}/{len(self.modules)} modules")
+            if not data_store:
+                return data_store, None
+            if metrics_thread is None:
+                metrics_thread, metrics_result = self._start_metrics(data_store)
+            metrics_thread.join()
+            if "error" in metrics_result:
+                print(f"Metrics failed: {metrics_result['error']}")
+            else:
+                metrics = metrics_result["metrics"]
+        finally:
+            # Backends that began are always finished, so the streaming workbook is
+            # closed; without metrics each one reports a failed export.
+            if started:
+                for backend in self.backends:
+                    with instrumentation.timer(f"export.{backend.name}"):
+                        backend.finish(metrics)
+        return data_store, metrics
@@ -0,0 +1,113 @@
+# rate_limiter.py
+import random
+import threading
+import time
+from typing import Optional
+import instrumentation
+
+
+class CreditBudgetExceeded(RuntimeError):
+    pass
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter shared by every HTTP call to Zoho.
+
+    The refill rate adapts AIMD-style: it grows additively after successful
+    responses and halves on 429. Retry-After and Zoho's X-RATELIMIT-* headers
+    pause all callers, not just the thread that saw them. An optional credit
+    budget caps the total number of calls made through this limiter.
+    """
+    def __init__(self, rate: Optional[float], burst: int = 1, min_rate: float = 0.2,
+                 max_rate: Optional[float] = None, increase: float = 0.1,
+                 credit_budget: int = 0, backoff_base: float = 1.0, backoff_cap: float = 60.0):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.increase = increase
+        self.credit_budget = credit_budget
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.credits_used = 0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> "RateLimiter":
+        # RATE_LIMIT_DELAY of 0 disables pacing entirely.
+        rate = 1.0 / config.RATE_LIMIT_DELAY if config.RATE_LIMIT_DELAY > 0 else None
+        max_rate = max(rate, config.MAX_REQUESTS_PER_SECOND) if rate else None
+        return cls(rate, burst=config.RATE_LIMIT_BURST, max_rate=max_rate, credit_budget=config.API_CREDIT_BUDGET)
+
+    def _refill(self, now: float):
+        if self.rate:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, cost: int = 1):
+        while True:
+            with self._lock:
+                if self.credit_budget and self.credits_used + cost > self.credit_budget:
+                    raise CreditBudgetExceeded(f"API credit budget of {self.credit_budget} exhausted")
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and (not self.rate or self._tokens >= 1):
+                    if self.rate:
+                        self._tokens -= 1
+                    self.credits_used += cost
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate if self.rate else 0)
+            with instrumentation.timer("ratelimit.wait"):
+                time.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def on_response(self, resp, attempt: int = 0) -> Optional[float]:
+        """
+        Feeds a response back into the limiter. Returns the pause applied for a 429
+        (so callers can log it), otherwise None.
+        """
+        self._apply_headers(resp.headers)
+        if resp.status_code == 429:
+            instrumentation.count("http.429")
+            retry_after = resp.headers.get("Retry-After")
+            try:
+                wait = float(retry_after)
+            except (TypeError, ValueError):
+                # Full jitter can come out near zero; a 429 always pauses at least a second.
+                wait = max(1.0, self.backoff_delay(attempt + 3))
+            with self._lock:
+                if self.rate:
+                    self.rate = max(self.min_rate, self.rate / 2)
+                self._tokens = 0.0
+            self.pause(wait)
+            return wait
+        if resp.status_code < 400 and self.rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+        return None
+
+    def _apply_headers(self, headers):
+        remaining = headers.get("X-RATELIMIT-REMAINING")
+        reset = headers.get("X-RATELIMIT-RESET")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining, reset = int(remaining), float(reset)
+        except ValueError:
+            return
+        # Zoho reports the reset either as seconds or as an epoch timestamp in ms.
+        if reset > 1e12:
+            reset = reset / 1000 - time.time()
+        if remaining <= 0 and reset > 0:
+            self.pause(reset)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
@@ -0,0 +1,117 @@
+# record_cache.py
+import json
+import os
+import time
+from typing import Dict, Optional
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    feather = None
+
+# Bump when the flattened/cleaned frame layout changes so stale files are ignored.
+CACHE_SCHEMA_VERSION = 1
+_META_KEY = b"zoho_record_cache"
+
+
+class RecordCache:
+    """
+    On-disk cache of each module's cleaned DataFrame as uncompressed Feather (Arrow IPC),
+    so files can be memory-mapped on load. Version and write time live in the Arrow
+    schema metadata. With keep_in_memory (service mode) the last saved or loaded
+    frame of each module is also held in memory and served without touching disk.
+    """
+    def __init__(self, directory: str, ttl_seconds: Optional[float] = None, keep_in_memory: bool = False):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.keep_in_memory = keep_in_memory
+        self._memory: Dict[str, tuple] = {}
+
+    @staticmethod
+    def available() -> bool:
+        return pa is not None
+
+    def _path(self, module: str) -> str:
+        return os.path.join(self.directory, f"{module}.feather")
+
+    @staticmethod
+    def _to_table(df: pd.DataFrame):
+        try:
+            return pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            # Mixed-type object columns can't be represented in Arrow; store them as text.
+            df = df.copy()
+            for col in df.columns:
+                if df[col].dtype == "object":
+                    try:
+                        pa.array(df[col], from_pandas=True)
+                    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+                        df[col] = df[col].map(lambda v: v if v is None or v != v else str(v))
+            return pa.Table.from_pandas(df, preserve_index=False)
+
+    def save(self, module: str, df: pd.DataFrame):
+        if not self.available():
+            print("    ⚠ pyarrow not installed; record cache disabled")
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        table = self._to_table(df)
+        meta = {"schema_version": CACHE_SCHEMA_VERSION, "module": module,
+                "written_at": time.time(), "rows": len(df), "columns": list(map(str, df.columns)),
+                "attrs": df.attrs}
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), _META_KEY: json.dumps(meta).encode()})
+        path = self._path(module)
+        tmp = path + ".tmp"
+        feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp, path)
+        if self.keep_in_memory:
+            self._memory[module] = (df, meta["written_at"])
+
+    def metadata(self, module: str) -> Optional[Dict]:
+        path = self._path(module)
+        if not self.available() or not os.path.exists(path):
+            return None
+        schema = feather.read_table(path, memory_map=True, columns=[]).schema
+        raw = (schema.metadata or {}).get(_META_KEY)
+        return json.loads(raw) if raw else None
+
+    def is_fresh(self, module: str) -> bool:
+        meta = self.metadata(module)
+        if not meta or meta.get("schema_version") != CACHE_SCHEMA_VERSION:
+            return False
+        if self.ttl_seconds is not None and time.time() - meta.get("written_at", 0) > self.ttl_seconds:
+            return False
+        return True
+
+    def load(self, module: str, zero_copy: bool = False) -> Optional[pd.DataFrame]:
+        """
+        Returns the cached frame, or None when missing, stale or from another schema version.
+        With zero_copy=True the columns stay Arrow-backed views over the memory-mapped file
+        (a frame already held in memory is served as is either way).
+        """
+        if module in self._memory:
+            df, written_at = self._memory[module]
+            if self.ttl_seconds is None or time.time() - written_at <= self.ttl_seconds:
+                # Shallow copy: callers may add or replace columns without touching the held frame.
+                return df.copy(deep=False)
+            del self._memory[module]
+        if not self.is_fresh(module):
+            return None
+        table = feather.read_table(self._path(module), memory_map=True)
+        df = table.to_pandas(types_mapper=pd.ArrowDtype) if zero_copy else table.to_pandas()
+        meta = json.loads(table.schema.metadata[_META_KEY])
+        df.attrs.update(meta.get("attrs") or {})
+        if self.keep_in_memory and not zero_copy:
+            self._memory[module] = (df, meta["written_at"])
+            return df.copy(deep=False)
+        return df
+
+    def load_all(self, modules, zero_copy: bool = False) -> Dict[str, pd.DataFrame]:
+        data = {}
+        for module in modules:
+            df = self.load(module, zero_copy=zero_copy)
+            if df is not None:
+                data[module] = df
+        return data
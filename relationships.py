@@ -0,0 +1,150 @@
+# relationships.py
+"""
+Id-keyed relationship index over the fetched modules, built once per run. Every
+record's code is its row position in its module frame; owners get codes shared
+across modules; and every lookup column becomes a join array holding, for each
+row, the code of the record it points to (-1 when empty or not fetched). Questions
+that span modules ("calls per account", "win rate by owner") then come down to
+array indexing and np.bincount over codes instead of DataFrame merges.
+"""
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+import instrumentation
+
+# Lookup columns per module: <field>_id when flattened from the JSON API, or the
+# bare <field> of a Bulk Read CSV that kept its layout. Zoho record ids are unique
+# across modules, so polymorphic lookups (Related_To, What_Id) are resolved against
+# every candidate module and land in whichever one holds the id.
+LOOKUPS = {
+    "Contacts": ["Account_Name"],
+    "Pipelines": ["Account_Name", "Contact_Name"],
+    "Calls": ["Related_To", "What_Id", "Who_Id"],
+    "Events": ["Related_To", "What_Id", "Who_Id"],
+    "Tasks": ["Related_To", "What_Id", "Who_Id"],
+}
+TARGETS = ("Accounts", "Contacts", "Pipelines")
+MISSING = -1
+
+
+def group_count(codes: np.ndarray, size: int, mask: Optional[np.ndarray] = None,
+                weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """Per-code row count (or weight sum) over the rows with a code, optionally masked."""
+    if codes.size == 0:
+        return np.zeros(size, dtype=np.int64 if weights is None else float)
+    keep = codes >= 0
+    if mask is not None:
+        keep &= mask
+    return np.bincount(codes[keep], weights=None if weights is None else weights[keep], minlength=size)
+
+
+def lookup_column(df: pd.DataFrame, field: str) -> Optional[str]:
+    """The column holding the ids of a lookup field, in either column layout."""
+    for col in (f"{field}_id", field):
+        if col in df.columns:
+            return col
+    return None
+
+
+class _IdLookup:
+    """id -> code for one module; duplicate ids resolve to their first row."""
+    def __init__(self, ids: pd.Series):
+        positions = pd.Series(np.arange(len(ids)), index=pd.Index(ids.astype(str)))
+        positions = positions[~positions.index.duplicated()]
+        self.index = positions.index
+        self.positions = positions.to_numpy()
+
+    def codes(self, values: pd.Series) -> np.ndarray:
+        values = values.astype(object)
+        found = self.index.get_indexer(values.where(values.isna(), values.astype(str)))
+        return np.where(found >= 0, self.positions[np.maximum(found, 0)], MISSING)
+
+
+class RelationshipIndex:
+    def __init__(self, data_store: Dict[str, pd.DataFrame]):
+        self.frames = {m: df for m, df in data_store.items()
+                       if df is not None and not df.empty and "id" in df.columns}
+        self.sizes = {m: len(df) for m, df in self.frames.items()}
+        self._lookups = {m: _IdLookup(df["id"]) for m, df in self.frames.items()}
+        self._build_owners()
+        self._build_links()
+
+    @classmethod
+    @instrumentation.timed("relationships.build")
+    def build(cls, data_store: Dict[str, pd.DataFrame]) -> "RelationshipIndex":
+        return cls(data_store)
+
+    def _build_owners(self):
+        owned = {m: df for m, df in self.frames.items() if lookup_column(df, "Owner")}
+        for module in self.frames.keys() - owned.keys():
+            print(f"    ⚠ relationships: {module} has no owner column; left out of the per-owner tables")
+        if not owned:
+            self.owner_ids, self.owner_names, self.owners = pd.Index([], dtype=object), np.array([], dtype=object), {}
+            return
+        ids = pd.concat([df[lookup_column(df, "Owner")].astype(object) for df in owned.values()], ignore_index=True)
+        names = pd.concat([df["Owner_name"].astype(object) if "Owner_name" in df.columns
+                           else pd.Series(None, index=df.index, dtype=object) for df in owned.values()],
+                          ignore_index=True)
+        codes, self.owner_ids = pd.factorize(ids.where(ids.notna(), None).astype(object))
+        valid = codes >= 0
+        first_name = pd.Series(names.to_numpy()[valid]).groupby(codes[valid]).first()
+        # Bulk-fetched modules carry owner ids only; an owner never named elsewhere shows its id.
+        self.owner_names = first_name.reindex(range(len(self.owner_ids))).to_numpy(dtype=object, copy=True)
+        unnamed = pd.isna(self.owner_names)
+        self.owner_names[unnamed] = np.asarray(self.owner_ids, dtype=object)[unnamed]
+        self.owners, start = {}, 0
+        for module, df in owned.items():
+            self.owners[module] = codes[start:start + len(df)].astype(np.int64)
+            start += len(df)
+
+    def _build_links(self):
+        self.links: Dict[tuple, np.ndarray] = {}
+        for module, prefixes in LOOKUPS.items():
+            df = self.frames.get(module)
+            if df is None:
+                continue
+            columns = [c for c in (lookup_column(df, prefix) for prefix in prefixes) if c]
+            if not columns:
+                print(f"    ⚠ relationships: {module} has no lookup columns ({', '.join(prefixes)}); "
+                      f"left out of the cross-module tables")
+            for col in columns:
+                for target in TARGETS:
+                    if target == module or target not in self._lookups:
+                        continue
+                    codes = self._lookups[target].codes(df[col])
+                    if not (codes >= 0).any():
+                        continue
+                    key = (module, target)
+                    self.links[key] = np.where(self.links[key] >= 0, self.links[key], codes) \
+                        if key in self.links else codes
+
+    def owner(self, module: str) -> np.ndarray:
+        """Owner code of every row of module (-1 without an owner)."""
+        return self.owners.get(module, np.full(self.sizes.get(module, 0), MISSING, dtype=np.int64))
+
+    def link(self, module: str, target: str) -> np.ndarray:
+        """Code in target of the record each row of module points to (-1 when none)."""
+        return self.links.get((module, target), np.full(self.sizes.get(module, 0), MISSING, dtype=np.int64))
+
+    def account(self, module: str) -> np.ndarray:
+        """
+        Account code of every row: the direct account lookup, else the account of the
+        linked contact, else the account of the linked deal.
+        """
+        if module == "Accounts":
+            return np.arange(self.sizes.get(module, 0))
+        codes = self.link(module, "Accounts")
+        for via in ("Contacts", "Pipelines"):
+            if via == module:
+                continue
+            through = self.link(module, via)
+            via_account = self.link(via, "Accounts")
+            if via_account.size == 0 or not (through >= 0).any():
+                continue
+            indirect = np.where(through >= 0, via_account[np.maximum(through, 0)], MISSING)
+            codes = np.where(codes >= 0, codes, indirect)
+        return codes
+
+    def column(self, module: str, col: str) -> Optional[pd.Series]:
+        df = self.frames.get(module)
+        return df[col] if df is not None and col in df.columns else None
@@ -0,0 +1,374 @@
+# service.py
+"""
+Long-running report service. One process keeps the SQLAlchemy engine, the pooled
+HTTP session, the API client (token state, rate limiter, field metadata) and the
+in-memory record cache warm, and runs report jobs one at a time: on cron-like
+schedules and on request from a local socket.
+
+    python service.py run --job "0 7 * * *|--pipeline --formats xlsx,parquet"
+    python service.py trigger -- --from-cache --start 2024-01-01 --end 2024-03-31
+    python service.py status
+    python service.py stop
+
+Each job gets a fresh Config, so its report window is computed when the job
+starts rather than when the process started. Job flags are main.py's flags.
+The trigger socket only binds to loopback, every request must carry the shared
+secret, and triggered jobs may not use flags that write to a chosen path.
+"""
+import argparse
+import hmac
+import ipaddress
+import json
+import os
+import queue
+import secrets
+import shlex
+import socket
+import socketserver
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+from typing import List, Optional
+from config import Config
+import main
+
+# minute, hour, day of month, month, day of week (0 or 7 = Sunday)
+CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+HISTORY_SIZE = 20
+# main.py flags that write files at a caller-chosen path: scheduled jobs may use
+# them, jobs sent over the trigger socket may not.
+PATH_FLAGS = ("profile", "report_json", "prometheus")
+
+
+def is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def load_secret(cfg) -> str:
+    """ZOHO_SERVICE_SECRET, else the secret the running service wrote to SERVICE_SECRET_FILE."""
+    if cfg.SERVICE_SECRET:
+        return cfg.SERVICE_SECRET
+    try:
+        with open(cfg.SERVICE_SECRET_FILE, encoding="utf-8") as fh:
+            return fh.read().strip()
+    except OSError:
+        return ""
+
+
+def ensure_secret(cfg) -> str:
+    """The configured secret, or a new random one written to SERVICE_SECRET_FILE readable by this user only."""
+    if cfg.SERVICE_SECRET:
+        return cfg.SERVICE_SECRET
+    secret = secrets.token_urlsafe(32)
+    fd = os.open(cfg.SERVICE_SECRET_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(secret)
+    return secret
+
+
+def path_flags(argv: List[str]) -> List[str]:
+    """The PATH_FLAGS a job's flags set (parsed, so abbreviations like --prof are caught too)."""
+    try:
+        args = main.parse_args(argv)
+    except SystemExit:
+        return []  # invalid flags fail again, harmlessly, when the job runs
+    return ["--" + name.replace("_", "-") for name in PATH_FLAGS if getattr(args, name)]
+
+
+class CronSchedule:
+    """Five-field cron expression: *, lists (a,b), ranges (a-b) and steps (*/n, a-b/n)."""
+    def __init__(self, expr: str):
+        parts = expr.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron expression needs 5 fields, got '{expr}'")
+        self.expr = expr
+        self.minute, self.hour, self.dom, self.month, self.dow = (
+            self._parse(part, lo, hi) for part, (lo, hi) in zip(parts, CRON_FIELDS))
+        self.dow = frozenset(d % 7 for d in self.dow)
+        self._dom_any, self._dow_any = parts[2] == "*", parts[4] == "*"
+
+    @staticmethod
+    def _parse(text: str, lo: int, hi: int) -> frozenset:
+        values = set()
+        for part in text.split(","):
+            base, _, step = part.partition("/")
+            step = int(step) if step else 1
+            if base == "*":
+                start, end = lo, hi
+            elif "-" in base:
+                start, end = (int(v) for v in base.split("-", 1))
+            else:
+                start = int(base)
+                end = hi if step > 1 else start
+            if step < 1 or not lo <= start <= end <= hi:
+                raise ValueError(f"invalid cron field '{text}' (allowed {lo}-{hi})")
+            values.update(range(start, end + 1, step))
+        return frozenset(values)
+
+    def matches(self, at: datetime) -> bool:
+        if at.minute not in self.minute or at.hour not in self.hour or at.month not in self.month:
+            return False
+        dom = at.day in self.dom
+        dow = (at.weekday() + 1) % 7 in self.dow
+        # As in cron: when both day fields are restricted, either may match.
+        if not self._dom_any and not self._dow_any:
+            return dom or dow
+        return dom and dow
+
+
+class Job:
+    def __init__(self, schedule: str, argv: List[str], name: Optional[str] = None):
+        self.schedule = CronSchedule(schedule)
+        self.argv = argv
+        self.name = name or " ".join(argv) or "default"
+
+    @classmethod
+    def parse(cls, spec: str) -> "Job":
+        """'<cron>|<main.py flags>', e.g. '0 7 * * *|--pipeline --formats xlsx'."""
+        schedule, _, flags = spec.partition("|")
+        return cls(schedule.strip(), shlex.split(flags))
+
+
+class WarmResources:
+    """What the service keeps between jobs for one service row of zoho_tokens."""
+    def __init__(self, cfg, service: str):
+        from db import DB
+        from record_cache import RecordCache
+        from transport import make_session
+        self.cfg = cfg
+        self.service = service
+        self.tenant = None
+        cache_dir = cfg.RECORD_CACHE_DIR
+        if service != main.SERVICE_NAME:
+            from batch import tenant_name
+            self.tenant = tenant_name(service)
+            cache_dir = os.path.join(cache_dir, self.tenant)
+        self.db = DB(cfg.SQL_ODBC) if cfg.SQL_ODBC else None
+        self.session = make_session(cfg.FETCH_CONCURRENCY)
+        self.cache = RecordCache(cache_dir, ttl_seconds=cfg.RECORD_CACHE_TTL_HOURS * 3600, keep_in_memory=True)
+        self.client = None
+
+    def for_job(self, argv: List[str]) -> dict:
+        """Keyword arguments for main.main(); the API client is opened on the first job that fetches."""
+        args = main.parse_args(argv)
+        if self.client is None and self.db is not None and not (args.from_cache or args.from_aggregates
+                                                                or args.batch or args.services):
+            _, self.client = main.open_client(self.cfg, self.service, self.db, self.session)
+        elif self.client is not None:
+            # Schemas go back through the field cache each job, so its TTL and ETag
+            # revalidation apply and a failed settings/fields call isn't kept.
+            self.client.clear_schemas()
+        return {"service": self.service, "tenant": self.tenant, "db": self.db, "session": self.session,
+                "client": self.client, "cache": self.cache}
+
+    def close(self):
+        self.session.close()
+        if self.db is not None:
+            self.db.engine.dispose()
+
+
+class ReportService:
+    """Runs queued jobs one at a time on the calling thread; schedules and triggers only enqueue."""
+    def __init__(self, cfg, jobs: List[Job], service: str = main.SERVICE_NAME, secret: Optional[str] = None):
+        self.cfg = cfg
+        self.jobs = jobs
+        self.secret = secret if secret is not None else ensure_secret(cfg)
+        self.warm = WarmResources(cfg, service)
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.running = None
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+
+    def submit(self, argv: List[str], name: Optional[str] = None) -> Future:
+        """Queues a job; a scheduled job that is already queued is not queued again."""
+        name = name or " ".join(argv) or "default"
+        future = Future()
+        with self._lock:
+            if name in self._queued:
+                future.set_result({"ok": False, "skipped": "already queued"})
+                return future
+            self._queued.add(name)
+        self._queue.put((name, argv, future))
+        return future
+
+    def status(self) -> dict:
+        return {"service": self.warm.service, "running": self.running, "queued": self._queue.qsize(),
+                "jobs": [{"name": j.name, "schedule": j.schedule.expr} for j in self.jobs],
+                "history": list(self.history)}
+
+    def stop(self):
+        self._stop.set()
+
+    def _run_job(self, name: str, argv: List[str]) -> dict:
+        started = datetime.now()
+        start = time.perf_counter()
+        self.running = name
+        print(f"\n▶ Job '{name}' started {started:%Y-%m-%d %H:%M:%S}")
+        try:
+            # A fresh Config per job: the default window is the current month as of now.
+            ok = bool(main.main(argv, Config(), **self.warm.for_job(argv)))
+            error = None
+        except SystemExit as e:  # argparse rejected the job's flags
+            ok, error = False, f"invalid flags (exit {e.code})"
+        except Exception as e:
+            traceback.print_exc()
+            ok, error = False, str(e)
+        finally:
+            self.running = None
+        result = {"name": name, "started": started.isoformat(timespec="seconds"),
+                  "seconds": round(time.perf_counter() - start, 2), "ok": ok}
+        if error:
+            result["error"] = error
+        self.history.append(result)
+        print(f"■ Job '{name}': {'ok' if ok else 'failed'} ({result['seconds']}s)")
+        return result
+
+    def _schedule_loop(self):
+        last = None
+        while not self._stop.is_set():
+            now = datetime.now().replace(second=0, microsecond=0)
+            if now != last:
+                last = now
+                for job in self.jobs:
+                    if job.schedule.matches(now):
+                        self.submit(job.argv, job.name)
+            # Wake just after the next minute boundary.
+            at = datetime.now()
+            self._stop.wait(60.05 - at.second - at.microsecond / 1e6)
+
+    def serve_forever(self, host: str, port: int):
+        if not is_loopback(host):
+            raise ValueError(f"refusing to listen on {host}: the trigger socket is loopback only")
+        self._server = _TriggerServer((host, port), _TriggerHandler, self)
+        threading.Thread(target=self._server.serve_forever, name="trigger", daemon=True).start()
+        threading.Thread(target=self._schedule_loop, name="scheduler", daemon=True).start()
+        print(f"Service for '{self.warm.service}' listening on {host}:{port} with {len(self.jobs)} scheduled job(s)")
+        for job in self.jobs:
+            print(f"  ⏰ {job.schedule.expr}  {job.name}")
+        try:
+            while not self._stop.is_set():
+                try:
+                    name, argv, future = self._queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                with self._lock:
+                    self._queued.discard(name)
+                future.set_result(self._run_job(name, argv))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+            self.warm.close()
+            print("Service stopped.")
+
+
+class _TriggerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, handler, service: ReportService):
+        self.service = service
+        super().__init__(address, handler)
+
+
+class _TriggerHandler(socketserver.StreamRequestHandler):
+    """
+    One JSON request per line: {"run": [flags], "wait": true}, {"status": true} or
+    {"stop": true}, each with "secret" set to the service's shared secret.
+    """
+    def handle(self):
+        service = self.server.service
+        try:
+            request = json.loads(self.rfile.readline() or b"{}")
+            if not hmac.compare_digest(str(request.get("secret", "")).encode(), service.secret.encode()):
+                reply = {"error": "unauthorized"}
+            elif "run" in request:
+                argv = list(request["run"])
+                blocked = path_flags(argv)
+                if blocked:
+                    reply = {"error": f"not allowed in triggered jobs: {', '.join(blocked)}"}
+                else:
+                    future = service.submit(argv, request.get("name"))
+                    reply = future.result() if request.get("wait", True) else {"queued": True}
+            elif request.get("stop"):
+                service.stop()
+                reply = {"stopping": True}
+            else:
+                reply = service.status()
+        except (ValueError, TypeError) as e:
+            reply = {"error": f"bad request: {e}"}
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+def send(host: str, port: int, request: dict, secret: str, timeout: Optional[float] = None) -> dict:
+    """Sends one request to a running service and returns its reply."""
+    with socket.create_connection((host, port), timeout=timeout) as conn:
+        conn.sendall(json.dumps({**request, "secret": secret}).encode() + b"\n")
+        with conn.makefile("rb") as reply:
+            return json.loads(reply.readline())
+
+
+def parse_jobs(cfg, specs: List[str]) -> List[Job]:
+    specs = list(specs) + [s for s in cfg.SERVICE_JOBS.split(";") if s.strip()]
+    return [Job.parse(spec) for spec in specs]
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Warm report service: scheduled and on-demand runs in one process.")
+    parser.add_argument("--host", help="Trigger address (default: ZOHO_SERVICE_HOST or 127.0.0.1).")
+    parser.add_argument("--port", type=int, help="Trigger port (default: ZOHO_SERVICE_PORT or 8765).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_cmd = commands.add_parser("run", help="Start the service in the foreground.")
+    run_cmd.add_argument("--job", action="append", default=[], metavar="'CRON|FLAGS'",
+                         help="Scheduled job, e.g. '0 7 * * *|--pipeline --formats xlsx'. Repeatable; "
+                              "ZOHO_SERVICE_JOBS adds more.")
+    run_cmd.add_argument("--service", default=main.SERVICE_NAME, help="Service row in zoho_tokens to report on.")
+    trigger = commands.add_parser("trigger", help="Run a job now on the running service.")
+    trigger.add_argument("--no-wait", action="store_true", help="Return once the job is queued.")
+    trigger.add_argument("flags", nargs=argparse.REMAINDER, help="main.py flags for the job (after --).")
+    commands.add_parser("status", help="Show scheduled jobs, the running job and recent results.")
+    commands.add_parser("stop", help="Stop the service after the running job.")
+    args = parser.parse_args(argv)
+
+    cfg = Config()
+    host, port = args.host or cfg.SERVICE_HOST, args.port or cfg.SERVICE_PORT
+    if args.command == "run":
+        if not is_loopback(host):
+            parser.error(f"--host {host} is not a loopback address; the trigger socket is local only")
+        try:
+            jobs = parse_jobs(cfg, args.job)
+        except ValueError as e:
+            parser.error(str(e))
+        ReportService(cfg, jobs, args.service).serve_forever(host, port)
+        return 0
+
+    secret = load_secret(cfg)
+    if not secret:
+        print(f"ERROR: no service secret (set ZOHO_SERVICE_SECRET or start the service to create {cfg.SERVICE_SECRET_FILE})")
+        return 1
+    try:
+        if args.command == "trigger":
+            flags = args.flags[1:] if args.flags[:1] == ["--"] else args.flags
+            reply = send(host, port, {"run": flags, "wait": not args.no_wait}, secret)
+        else:
+            reply = send(host, port, {args.command: True}, secret)
+    except OSError as e:
+        print(f"ERROR: no service on {host}:{port} ({e})")
+        return 1
+    print(json.dumps(reply, indent=2))
+    return 0 if reply.get("ok", True) and "error" not in reply else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(cli())
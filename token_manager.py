@@ -1,38 +1,103 @@
 # token_manager.py
-import requests
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import instrumentation
+from rate_limiter import RateLimiter
+from transport import decode_json, make_session
+
+# Tokens inside this window are refreshed in the background while still being served.
+REFRESH_MARGIN = timedelta(minutes=5)
+# After a failed refresh, callers keep the current token for this long before retrying.
+FAILED_REFRESH_COOLDOWN = 30
+
+
+def _normalize_expiry(value):
+    """Returns the expiry as a naive UTC datetime, whatever form the DB handed back."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 
 class TokenManager:
     """
     Uses DB to fetch refresh token and persists access token and expiry.
+
+    Safe to share between threads: the current token is served without locking,
+    and refreshes are single-flight so concurrent callers (or a burst of 401s)
+    trigger one call to the token endpoint and one DB write.
+
+    The token endpoint lives on the accounts domain, which Zoho rate-limits apart
+    from the API host, so it has its own limiter: a 429 from accounts pauses
+    refreshes without slowing API calls (and refreshes spend no API credits).
     """
-    def __init__(self, config, db: 'DB', service_name: str = "zoho_bigin"):
+    def __init__(self, config, db: 'DB', service_name: str = "zoho_bigin", rate_limiter=None, session=None):
         self.config = config
+        # Shares the client's keep-alive session so refreshes skip the TLS handshake.
+        self.session = session or make_session(1)
         self.db = db
         self.service = service_name
+        # Unpaced (refreshes are single-flight) but honours the endpoint's 429s and Retry-After.
+        self.rate_limiter = rate_limiter or RateLimiter(None)
+        self._refresh_lock = threading.Lock()
+        self._background = None
+        self._retry_after = 0.0
 
         row = self.db.get_token_row(self.service)
         self.access_token = row["access_token"] if row else config.ACCESS_TOKEN
         self.refresh_token = row["refresh_token"] if row else config.REFRESH_TOKEN
-        self.token_expiry = row["expires_at"] if row and row["expires_at"] else None
+        self.token_expiry = _normalize_expiry(row["expires_at"]) if row else None
+
+    def _expired(self) -> bool:
+        return self.token_expiry is None or datetime.utcnow() >= self.token_expiry
+
+    def _expiring(self) -> bool:
+        return self.token_expiry is None or datetime.utcnow() >= self.token_expiry - REFRESH_MARGIN
 
     def get_valid_token(self) -> str:
-        if not self.refresh_token:
+        if not self.refresh_token or not self._expiring():
             return self.access_token
-
-        if self.token_expiry:
-            if isinstance(self.token_expiry, str):
-                try:
-                    self.token_expiry = datetime.fromisoformat(self.token_expiry)
-                except:
-                    self.token_expiry = None
-
-        if self.token_expiry is None or datetime.utcnow() >= (self.token_expiry - timedelta(minutes=5)):
-            refreshed = self._refresh_access_token()
-            if not refreshed:
-                return self.access_token
+        if not self._expired():
+            self._refresh_in_background()
+            return self.access_token
+        self.refresh()
         return self.access_token
 
+    def refresh(self, stale_token: str = None) -> bool:
+        """
+        Single-flight refresh. Callers that queued behind another refresh return as
+        soon as it lands instead of refreshing again. Pass the token that was
+        rejected (e.g. on 401) to force a refresh unless it has already been replaced.
+        """
+        with self._refresh_lock:
+            if stale_token is not None:
+                if self.access_token != stale_token:
+                    return True
+            elif not self._expiring():
+                return True
+            if time.monotonic() < self._retry_after:
+                return False
+            ok = self._refresh_access_token()
+            if not ok:
+                self._retry_after = time.monotonic() + FAILED_REFRESH_COOLDOWN
+            return ok
+
+    def _refresh_in_background(self):
+        if self._background is not None and self._background.is_alive():
+            return
+        self._background = threading.Thread(target=self.refresh, name=f"token-refresh-{self.service}", daemon=True)
+        self._background.start()
+
+    @instrumentation.timed("token.refresh")
     def _refresh_access_token(self) -> bool:
         try:
             params = {
@@ -41,19 +106,22 @@ class TokenManager:
                 'client_secret': self.config.CLIENT_SECRET,
                 'grant_type': 'refresh_token'
             }
-            resp = requests.post(self.config.TOKEN_URL, params=params, timeout=15)
+            self.rate_limiter.acquire()
+            resp = self.session.post(self.config.TOKEN_URL, params=params, timeout=15)
+            self.rate_limiter.on_response(resp)
             if resp.status_code != 200:
                 print(f"    ⚠ Token refresh failed: {resp.status_code} - {resp.text[:200]}")
                 return False
 
-            data = resp.json()
-            self.access_token = data.get("access_token")
+            data = decode_json(resp)
             expires_in = int(data.get("expires_in", 3600))
-            self.token_expiry = datetime.utcnow() + timedelta(seconds=expires_in)
-
             new_refresh = data.get("refresh_token", None)
             if new_refresh:
                 self.refresh_token = new_refresh
+            # Expiry first: a lock-free reader seeing the new expiry with the old
+            # token only gets a token that is still valid for a few more minutes.
+            self.token_expiry = datetime.utcnow() + timedelta(seconds=expires_in)
+            self.access_token = data.get("access_token")
 
             self.db.upsert_token(
                 service=self.service,